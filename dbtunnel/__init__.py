@@ -1,6 +1,9 @@
-import subprocess
-
-from dbtunnel.utils import ctx, compute_utils
+def __getattr__(name: str):
+    # ctx and compute_utils used to be created at import, they are now resolved on first access
+    if name in ("ctx", "compute_utils"):
+        from dbtunnel import utils
+        return getattr(utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class AppTunnels:
@@ -10,7 +13,12 @@ class AppTunnels:
 
     @staticmethod
     def kill_port(port: int):
-        subprocess.run(f"kill -9 $(lsof -t -i:{port})", capture_output=True, shell=True)
+        """
+        Stop the apps dbtunnel started on port, from this or any other notebook. Processes dbtunnel did not start
+        are left alone.
+        """
+        from dbtunnel.utils import kill_port
+        return kill_port(port, only_own=False)
 
     @staticmethod
     def fastapi(app, port: int = 8080):
@@ -1,9 +1,8 @@
 import os
-import subprocess
 import sys
 
-from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
-from dbtunnel.utils import execute
+from dbtunnel.tunnels import DbTunnel
+from dbtunnel.utils import kill_port
 from dbtunnel.vendor.asgiproxy.frameworks import Frameworks
 
 
@@ -41,39 +40,23 @@ class ArizePhoenixUITunnel(DbTunnel):
         self.display()
         self._log.info("Starting server...")
 
-        phoenix_service_port_no_share = 9099
         proxy_service = None
+        app_port = self._port
         if self._share is False:
-            url_base_path = self._proxy_settings.url_base_path
-            port = self._port
-
-            proxy_service = DbTunnelProxy(
-                proxy_port=port,
-                service_port=phoenix_service_port_no_share,
-                url_base_path=url_base_path,
-                framework=Frameworks.ARIZE_PHOENIX,
-                token_auth=self._basic_tunnel_auth["token_auth"],
-                token_auth_workspace_url=self._basic_tunnel_auth["token_auth_workspace_url"],
-            )
-
-            proxy_service.start()
+            app_port = self._claim_service_port(preferred=9099)
+            proxy_service = self._make_proxy(app_port, Frameworks.ARIZE_PHOENIX)
 
         my_env = os.environ.copy()
-        subprocess.run(f"kill -9 $(lsof -t -i:{self._port})", capture_output=True, shell=True)
+        kill_port(self._port)
 
-        if self.shared is False:
-            self._log.info(f"Deploying Arize Phoenix web ui app at path: "
-                           f"\n{get_arize_projects_url(self._proxy_settings.proxy_url)}")
+        cmd = [sys.executable, "-m", "phoenix.server.main", "--port", f"{app_port}", "serve"]
 
-        if self._share is False:
-            cmd = [sys.executable, "-m", "phoenix.server.main", "--port", f"{phoenix_service_port_no_share}",
-                   "serve"]
-        else:
-            cmd = [sys.executable, "-m", "phoenix.server.main", "--port", f"{self._port}", "serve"]
+        startup = self._orchestrate(
+            app_port,
+            f"Deploying Arize Phoenix web ui app at path: \n{get_arize_projects_url(self._proxy_settings.proxy_url)}",
+            proxy=proxy_service)
 
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path)
+        self._supervise(cmd, my_env, app_port=app_port, proxy=proxy_service)
 
-        if proxy_service is not None:
-            proxy_service.wait()
+        startup.wait()
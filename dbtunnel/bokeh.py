@@ -1,5 +1,5 @@
 from dbtunnel.tunnels import DbTunnel
-from dbtunnel.utils import execute, process_file
+from dbtunnel.utils import process_file, kill_port
 
 
 class BokehTunnel(DbTunnel):
@@ -26,15 +26,13 @@ class BokehTunnel(DbTunnel):
         self._log.info("Starting server...")
         import nest_asyncio
         nest_asyncio.apply()
-        self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
         with process_file(self._script_path) as file_path:
             self.run_bokeh(file_path, self._port)
 
     def run_bokeh(self, path, port):
         import os
-        import subprocess
         my_env = os.environ.copy()
-        subprocess.run(f"kill -9 $(lsof -t -i:{port})", capture_output=True, shell=True)
+        kill_port(port)
         # static assets otherwise get served by root and the root path is not allowed!
         my_env["BOKEH_RESOURCES"] = "cdn"
         self._log.info(f"Deploying {self._flavor} app at path: {path} on port: {port}")
@@ -48,6 +46,8 @@ class BokehTunnel(DbTunnel):
                # "--prefix",
                # server_path_prefix
                ]
+        startup = self._orchestrate(port, f"Use this link: \n{self._proxy_settings.proxy_url}")
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path)
+        self._supervise(cmd, my_env, app_port=port)
+
+        startup.wait()
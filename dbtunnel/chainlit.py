@@ -1,5 +1,4 @@
-from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
-from dbtunnel.utils import execute
+from dbtunnel.tunnels import DbTunnel
 from dbtunnel.vendor.asgiproxy.frameworks import Frameworks
 
 class ChainlitAppTunnel(DbTunnel):
@@ -16,44 +15,27 @@ class ChainlitAppTunnel(DbTunnel):
     def _run(self):
         import os
 
-        chainlit_service_port_no_share = 9090
         proxy_service = None
+        app_port = self._port
         if self._share is False:
-
-            url_base_path = self._proxy_settings.url_base_path
-            port = self._port
-
-            # nest uvicorn to the ipynotebook asyncio eventloop so restarting kernel kills server
-            proxy_service = DbTunnelProxy(
-                proxy_port=port,
-                service_port=chainlit_service_port_no_share,
-                url_base_path=url_base_path,
-                framework=Frameworks.CHAINLIT,
-                token_auth=self._basic_tunnel_auth["token_auth"],
-                token_auth_workspace_url=self._basic_tunnel_auth["token_auth_workspace_url"],
-                cwd=self._cwd
-            )
-
-            proxy_service.start()
-
-        self._log.info(f"Use this link to access the Chainlit UI in Databricks: \n{self._proxy_settings.proxy_url}")
+            app_port = self._claim_service_port(preferred=9090)
+            proxy_service = self._make_proxy(app_port, Frameworks.CHAINLIT, cwd=self._cwd)
 
         self._log.info("Starting chainlit...")
 
         my_env = os.environ.copy()
 
-        if self._share is False:
-            cmd = ["chainlit", "run", self._chainlit_script_path, "-h", "--host", "0.0.0.0", "--port",
-                   f"{chainlit_service_port_no_share}"]
-        else:
-            cmd = ["chainlit", "run", self._chainlit_script_path, "-h", "--host", "0.0.0.0", "--port", f"{self._port}"]
+        cmd = ["chainlit", "run", self._chainlit_script_path, "-h", "--host", "0.0.0.0", "--port", f"{app_port}"]
+
+        startup = self._orchestrate(
+            app_port,
+            f"Use this link to access the Chainlit UI in Databricks: \n{self._proxy_settings.proxy_url}",
+            proxy=proxy_service)
 
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env, cwd=self._cwd):
-            self._log.info(path)
+        self._supervise(cmd, my_env, cwd=self._cwd, app_port=app_port, proxy=proxy_service)
 
-        if proxy_service is not None:
-            proxy_service.wait()
+        startup.wait()
 
     def __init__(self, chainlit_script_path: str, cwd: str = None, port: int = 8000):
         super().__init__(port, "chainlit")
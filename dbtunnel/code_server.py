@@ -2,7 +2,7 @@ import os
 import subprocess
 
 from dbtunnel.tunnels import DbTunnel, get_current_username
-from dbtunnel.utils import execute
+from dbtunnel.utils import kill_port, log_lines, spawn
 
 
 class CodeServerTunnel(DbTunnel):
@@ -45,19 +45,22 @@ class CodeServerTunnel(DbTunnel):
         command = "curl -fsSL https://raw.githubusercontent.com/databricks/setup-cli/main/install.sh | sh"
         env_copy = os.environ.copy()
         already_installed = False
-        try:
-            for stmt in execute([command], shell=True, env=env_copy):
-                if "already exists" in stmt:
-                    already_installed = True
-                self._log.info(stmt)
-        except subprocess.CalledProcessError as e:
-            if already_installed is False:
-                raise e
+
+        def on_lines(lines):
+            nonlocal already_installed
+            already_installed = already_installed or any("already exists" in line for line in lines)
+            self._log.info("\n".join(lines))
+
+        return_code = spawn([command], env_copy, on_lines, shell=True).wait()
+        if return_code and already_installed is False:
+            raise subprocess.CalledProcessError(return_code, command)
         self._log.info("Finished installing databricks cli")
 
     def _install_extension(self, env, extension_id: str):
-        for stmt in execute(["code-server", "--install-extension", extension_id], shell=True, env=env):
-            self._log.info(stmt)
+        cmd = ["code-server", "--install-extension", extension_id]
+        return_code = spawn(cmd, env, log_lines(self._log), shell=True).wait()
+        if return_code:
+            raise subprocess.CalledProcessError(return_code, cmd)
         self._log.info(f"Finished Installed extension: {extension_id}")
 
     def _install_extensions(self, env, extensions: list[str]):
@@ -67,22 +70,21 @@ class CodeServerTunnel(DbTunnel):
     def _run(self):
         import subprocess
 
-        self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}?folder={self._dir_path}")
         self._log.info("It may take a 15-30 seconds for the code server to start up.")
 
-        self._log.info("Installing code server")
-        url = "https://code-server.dev/install.sh"
-        # Equivalent Python subprocess command with piping
-        subprocess.run(f'curl -fsSL {url} | sh', check=True, shell=True)
-        self._log.info("Installed code server")
+        with self._timed_phase("install"):
+            self._log.info("Installing code server")
+            url = "https://code-server.dev/install.sh"
+            # Equivalent Python subprocess command with piping
+            subprocess.run(f'curl -fsSL {url} | sh', check=True, shell=True)
+            self._log.info("Installed code server")
 
-        self._install_databricks_cli()
+            self._install_databricks_cli()
 
         import os
-        import subprocess
         my_env = os.environ.copy()
         my_env["VSCODE_PROXY_URI"] = self._proxy_settings.url_base_path + "wss"
-        subprocess.run(f"kill -9 $(lsof -t -i:{self._port})", capture_output=True, shell=True)
+        kill_port(self._port)
 
         self._log.info(f"Installing default plugins!")
         default_plugins = [
@@ -95,7 +97,8 @@ class CodeServerTunnel(DbTunnel):
             "databricks.sqltools-databricks-driver",
             "rangav.vscode-thunder-client",
         ]
-        self._install_extensions(my_env, list(set(default_plugins + self._extension_ids)))
+        with self._timed_phase("install_extensions"):
+            self._install_extensions(my_env, list(set(default_plugins + self._extension_ids)))
 
         # "VSCODE_PROXY_URI=“./driver-proxy/o/<id>/1201-175053-rt06lneb/8080/wss” code-server --bind-addr 0.0.0.0:8080  --auth none"
         self._log.info(f"Deploying code server on port: {self._port}")
@@ -104,6 +107,6 @@ class CodeServerTunnel(DbTunnel):
                f"0.0.0.0:{self._port}",
                "--auth",
                "none"]
+        self._orchestrate(self._port, f"Use this link: \n{self._proxy_settings.proxy_url}?folder={self._dir_path}")
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path)
\ No newline at end of file
+        self._supervise(cmd, my_env, app_port=self._port)
\ No newline at end of file
@@ -17,12 +17,18 @@ class DashAppTunnel(DbTunnel):
             self._log.info("ImportError: Make sure you have fastapi, nest_asyncio, dash and uvicorn installed;"
                   "pip install fastapi nest_asyncio dash uvicorn")
             raise e
+        if self._wsgi_workers is not None:
+            try:
+                import gunicorn
+            except ImportError as e:
+                self._log.info("ImportError: Make sure you have gunicorn installed to use wsgi workers;"
+                               "pip install gunicorn")
+                raise e
 
     def _run(self):
         self.display()
         self._log.info("Starting server...")
         from fastapi import FastAPI
-        import uvicorn
         from fastapi.middleware.wsgi import WSGIMiddleware
         app = FastAPI(root_path=self._proxy_settings.url_base_path.rstrip("/"))
         # DASH HACK
@@ -32,25 +38,15 @@ class DashAppTunnel(DbTunnel):
             'routes_pathname_prefix': self._proxy_settings.url_base_path,
             'requests_pathname_prefix': self._proxy_settings.url_base_path
         })
-        app.mount("/", WSGIMiddleware(self._dash_app.server))
-        import nest_asyncio
-        nest_asyncio.apply()
-
-        # uvicorn.run(app, host="0.0.0.0", port=self._port)
-        # Start the server
-        async def start():
-            config = uvicorn.Config(
-                app,
-                host="0.0.0.0",
-                port=self._port,
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
-        asyncio.run(start())
+        if self._wsgi_workers is not None:
+            # dash keeps the full proxy prefix in its routes; workers importing the app read it from the environment
+            self._serve_wsgi_workers(self._dash_app.server,
+                                     env={"DASH_ROUTES_PATHNAME_PREFIX": self._proxy_settings.url_base_path,
+                                          "DASH_REQUESTS_PATHNAME_PREFIX": self._proxy_settings.url_base_path})
+            return
+        app.mount("/", WSGIMiddleware(self._dash_app.server))
+        self._serve_uvicorn(app)
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
@@ -0,0 +1,2 @@
+class DBTunnelError(Exception):
+    pass
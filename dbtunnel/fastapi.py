@@ -21,27 +21,10 @@ class FastApiAppTunnel(DbTunnel):
         self.display()
         self._log.info("Starting server...")
         from fastapi import FastAPI
-        import uvicorn
         app = FastAPI(root_path=self._proxy_settings.url_base_path.rstrip("/"))
         app.mount("/", self._fastapi_app)
-        import nest_asyncio
-        nest_asyncio.apply()
-
-        # uvicorn.run(app, host="0.0.0.0", port=self._port)
-        # Start the server
-        async def start():
-            config = uvicorn.Config(
-                app,
-                host="0.0.0.0",
-                port=self._port,
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
-        asyncio.run(start())
+        self._serve_uvicorn(app)
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
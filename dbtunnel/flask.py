@@ -17,32 +17,30 @@ class FlaskAppTunnel(DbTunnel):
             self._log.info("ImportError: Make sure you have flask, fastapi, uvicorn and nest_asyncio installed;"
                   "pip install flask fastapi uvicorn nest_asyncio")
             raise e
+        if self._wsgi_workers is not None:
+            try:
+                import gunicorn
+            except ImportError as e:
+                self._log.info("ImportError: Make sure you have gunicorn installed to use wsgi workers;"
+                               "pip install gunicorn")
+                raise e
 
     def _run(self):
         self.display()
         self._log.info("Starting server...")
-        import uvicorn
+        if self._wsgi_workers is not None:
+            self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
+            # gunicorn strips SCRIPT_NAME off the path and flask builds its urls under it
+            self._serve_wsgi_workers(self._flask_app,
+                                     env={"SCRIPT_NAME": self._proxy_settings.url_base_path.rstrip("/")})
+            return
         from fastapi import FastAPI
         from fastapi.middleware.wsgi import WSGIMiddleware
 
         app = FastAPI(root_path=self._proxy_settings.url_base_path.rstrip("/"))
         app.mount("/", WSGIMiddleware(self._flask_app))
-        import nest_asyncio
-        nest_asyncio.apply()
-
-        async def start():
-            config = uvicorn.Config(
-                app,
-                host="0.0.0.0",
-                port=self._port,
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
-        asyncio.run(start())
+        self._serve_uvicorn(app)
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
@@ -1,7 +1,6 @@
 import os
 
-from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
-from dbtunnel.utils import execute
+from dbtunnel.tunnels import DbTunnel
 from dbtunnel.vendor.asgiproxy.frameworks import Frameworks
 
 
@@ -34,63 +33,41 @@ class GradioAppTunnel(DbTunnel):
 
         self._log.info("Starting server...")
 
-        gradio_service_port = 9908
-        port = self._port
-        url_base_path = self._proxy_settings.url_base_path
+        gradio_service_ports = self._claim_replica_ports(preferred=9908)
+        gradio_service_port = gradio_service_ports[0]
 
-        proxy_service = DbTunnelProxy(
-            proxy_port=port,
-            service_port=gradio_service_port,
-            url_base_path=url_base_path,
-            framework=Frameworks.GRADIO,
-            token_auth=self._basic_tunnel_auth["token_auth"],
-            token_auth_workspace_url=self._basic_tunnel_auth["token_auth_workspace_url"],
-            cwd=self._cwd
-        )
-
-        proxy_service.start()
-
-        self._log.info(f"Use this link to access the Gradio UI in Databricks: \n{self._proxy_settings.proxy_url}")
+        proxy_service = self._make_proxy(gradio_service_port, Frameworks.GRADIO, cwd=self._cwd,
+                                         service_ports=gradio_service_ports)
 
         self._log.info("Starting gradio...")
 
-        my_env = os.environ.copy()
-        my_env["GRADIO_SERVER_PORT"] = str(gradio_service_port)
-        my_env["GRADIO_SERVER_NAME"] = "0.0.0.0"
-
         cmd = ["python", self._app_path]
 
+        def launch(port):
+            my_env = os.environ.copy()
+            my_env["GRADIO_SERVER_PORT"] = str(port)
+            my_env["GRADIO_SERVER_NAME"] = "0.0.0.0"
+            return cmd, my_env
+
+        startup = self._orchestrate(
+            gradio_service_port,
+            f"Use this link to access the Gradio UI in Databricks: \n{self._proxy_settings.proxy_url}",
+            proxy=proxy_service)
+
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for log_stmt in execute(cmd, my_env, cwd=self._cwd):
-            self._log.info(log_stmt.rstrip("/n"))
+        self._supervise_replicas(launch, gradio_service_ports, cwd=self._cwd, proxy=proxy_service)
 
-        proxy_service.wait()
+        startup.wait()
 
     def _run_app(self):
         self.display()
         self._log.info("Starting server...")
         from fastapi import FastAPI
-        import uvicorn
         import gradio as gr
         app = FastAPI(root_path=self._proxy_settings.url_base_path.rstrip("/"))
         app = gr.mount_gradio_app(app, self._gradio_app, path="/")
-        import nest_asyncio
-        nest_asyncio.apply()
-
-        # Start the server
-        async def start():
-            config = uvicorn.Config(
-                app,
-                host="0.0.0.0",
-                port=self._port,
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
-        asyncio.run(start())
+        self._serve_uvicorn(app)
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class ResourceMonitor:
+    """
+    Samples RSS, cpu time, open fds and threads of the processes a tunnel started (the app and the proxy, each with
+    their children) from /proc every `interval` seconds. The latest sample is written as json to the metrics file
+    of the proxy port, which the proxy serves on /dbtunnel/metrics.
+
+    Shared processes, the proxy daemon serving every tunnel on the driver, are reported with "shared": true and left
+    out of the total since their usage is not this tunnel's alone.
+    """
+
+    def __init__(self, metrics_path: Path, interval: float = 15.0):
+        self._metrics_path = metrics_path
+        self.interval = interval
+        self._pids: Dict[str, int] = {}
+        self._shared: set = set()
+        self._previous: Dict[str, tuple] = {}
+        self._latest: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # resource_usage() and the sampling thread share the previous sample used for cpu percent
+        self._sample_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, role: str, pid: Optional[int], shared: bool = False):
+        """
+        Account pid and its descendants under role, replacing the previous pid, e.g. after a restart.
+        """
+        if pid is None:
+            return
+        with self._lock:
+            self._pids[role] = pid
+            if shared:
+                self._shared.add(role)
+            else:
+                self._shared.discard(role)
+            if self._thread is None and self.interval:
+                # a fresh event per thread so a thread from a previous run that is still waiting stays stopped
+                self._stopped = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stopped,),
+                                                name="dbtunnel-resource-monitor", daemon=True)
+                self._thread.start()
+
+    def sample(self) -> Dict[str, Any]:
+        with self._sample_lock:
+            return self._sample()
+
+    def _sample(self) -> Dict[str, Any]:
+        from dbtunnel.utils import get_process_children, get_process_tree_stats
+        now = time.monotonic()
+        with self._lock:
+            pids = dict(self._pids)
+            shared = set(self._shared)
+        children = get_process_children()
+        processes = {}
+        total = {"rss_bytes": 0, "cpu_seconds": 0.0, "open_fds": 0, "threads": 0}
+        for role, pid in pids.items():
+            stats = get_process_tree_stats(pid, children)
+            if stats is None:
+                processes[role] = {"pid": pid, "running": False}
+                continue
+            usage = {"pid": pid, "running": True, **stats.to_dict()}
+            if role in shared:
+                usage["shared"] = True
+            previous = self._previous.get(role)
+            if previous is not None and previous[0] == pid and now > previous[1]:
+                usage["cpu_percent"] = round(100 * (stats.cpu_seconds - previous[2]) / (now - previous[1]), 1)
+            self._previous[role] = (pid, now, stats.cpu_seconds)
+            processes[role] = usage
+            if role in shared:
+                continue
+            for key in total:
+                total[key] += usage[key]
+        total["cpu_seconds"] = round(total["cpu_seconds"], 3)
+        sample = {"timestamp": time.time(), "interval": self.interval, "processes": processes, "total": total}
+        self._latest = sample
+        return sample
+
+    @property
+    def latest(self) -> Dict[str, Any]:
+        return self._latest
+
+    def _write(self, sample: Dict[str, Any]):
+        self._metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._metrics_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(sample))
+        os.replace(tmp_path, self._metrics_path)
+
+    def _run(self, stopped: threading.Event):
+        while not stopped.is_set():
+            try:
+                self._write(self.sample())
+            except OSError as e:
+                logging.debug(f"Unable to sample resource usage: {e}")
+            stopped.wait(self.interval)
+
+    def stop(self):
+        with self._lock:
+            self._stopped.set()
+            self._thread = None
+            self._pids.clear()
+            self._shared.clear()
+        try:
+            self._metrics_path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Optional, TYPE_CHECKING
+
+from dbtunnel.ports import is_port_open, probe_http
+
+if TYPE_CHECKING:
+    from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
+
+
+class StartupOrchestrator:
+    """
+    Starts the proxy next to the app and only announces the url once the app answers on its port and the proxy is
+    listening, so users do not click the link while the app is still booting and get 502s.
+
+    The app itself is still run by the adapter on the calling thread, the readiness checks run on a watcher thread.
+    """
+
+    def __init__(self,
+                 tunnel: "DbTunnel",
+                 *,
+                 app_port: int,
+                 message: str,
+                 health_path: str = "/",
+                 proxy: Optional["DbTunnelProxy"] = None,
+                 timeout: float = 300.0,
+                 poll_interval: float = 0.25):
+        self._tunnel = tunnel
+        self._log = tunnel._log
+        self._app_port = app_port
+        self._message = message
+        self._health_path = health_path
+        self._proxy = proxy
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._ready = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name=f"dbtunnel-startup-{app_port}", daemon=True)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> "StartupOrchestrator":
+        if self._proxy is not None:
+            with self._tunnel._timed_phase("proxy"):
+                self._proxy.start()
+            self._tunnel._track_process("proxy", self._proxy.pid, shared=self._proxy.shared)
+        self._log.info(f"Waiting for {self._tunnel._flavor} to start on port {self._app_port}...")
+        self._watcher.start()
+        return self
+
+    def _wait_for(self, check, deadline: float) -> bool:
+        while time.monotonic() < deadline:
+            if check():
+                return True
+            time.sleep(self._poll_interval)
+        return False
+
+    def _watch(self):
+        started_at = time.monotonic()
+        deadline = started_at + self._timeout
+        if not self._wait_for(lambda: is_port_open("127.0.0.1", self._app_port), deadline):
+            self._log.warning(f"{self._tunnel._flavor} did not bind port {self._app_port} within {self._timeout}s, "
+                              f"it may still be starting: \n{self._message}")
+            return
+        self._tunnel._record_phase("bind", time.monotonic() - started_at)
+
+        health_url = f"http://127.0.0.1:{self._app_port}/{self._health_path.lstrip('/')}"
+        if self._wait_for(lambda: (probe_http(health_url) or 500) < 400, deadline):
+            self._tunnel._record_phase("first_200", time.monotonic() - started_at)
+        else:
+            self._log.warning(f"{health_url} did not return a successful response within {self._timeout}s")
+
+        if self._proxy is not None and not self._proxy.wait_until_ready(max(deadline - time.monotonic(), 0)):
+            self._log.warning(f"Proxy on port {self._proxy.proxy_port} did not start within {self._timeout}s")
+            return
+
+        self._ready.set()
+        self._log.info(self._message)
+        self._log.info(f"Startup timings: {self._tunnel.format_startup_timings()}")
+
+    def wait(self):
+        if self._proxy is not None:
+            self._proxy.wait()
+        return self
@@ -0,0 +1,146 @@
+import json
+import os
+import socket
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from dbtunnel.errors import DBTunnelError
+
+
+def is_port_open(host: str, port: int, timeout: float = 1.0) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def probe_http(url: str, timeout: float = 2.0) -> Optional[int]:
+    """
+    Returns the status code of a GET to url (following redirects) or None if nothing answered.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _port_bindable(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        # same flag uvicorn and most app servers set, so ports in TIME_WAIT still count as free
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("0.0.0.0", port))
+            return True
+        except OSError:
+            return False
+
+
+class PortRegistry:
+    """
+    Hands out service ports to the apps running on a driver. Claims go through an flock'd json file shared by every
+    notebook on the cluster, so two apps never get the same port and nobody has to kill whatever is on a port to
+    start. Entries of processes that no longer exist are dropped on every claim.
+
+    Tunnels reserve their own proxy port, and well known ports of apps that bind them directly (code-server's 9988)
+    are only handed out when asked for by name, so an app never gets a port another tunnel is about to bind.
+    """
+
+    def __init__(self,
+                 path: Optional[Path] = None,
+                 port_range: tuple = (9000, 9999),
+                 excluded_ports: tuple = (9988,)):
+        self._path = path or Path(os.path.expanduser("~")) / ".dbtunnel" / "ports.json"
+        self._lock_path = self._path.with_suffix(".lock")
+        self._port_range = port_range
+        self._excluded_ports = set(excluded_ports)
+
+    @contextmanager
+    def _locked(self):
+        import fcntl
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._path, "r") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {port: entry for port, entry in entries.items() if _pid_alive(entry.get("pid", -1))}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]):
+        tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self._path)
+
+    def claim(self, owner: str, preferred: Optional[int] = None) -> int:
+        """
+        Claim a free port for owner, preferred is tried first so single app setups keep their familiar ports.
+        """
+        with self._locked():
+            entries = self._load()
+            candidates = range(self._port_range[0], self._port_range[1] + 1)
+            if preferred is not None:
+                candidates = [preferred] + [port for port in candidates if port != preferred]
+            for port in candidates:
+                if port in self._excluded_ports and port != preferred:
+                    continue
+                if str(port) in entries or not _port_bindable(port):
+                    continue
+                entries[str(port)] = {"owner": owner, "pid": os.getpid(), "claimed_at": time.time()}
+                self._save(entries)
+                return port
+        raise DBTunnelError(f"No free port between {self._port_range[0]} and {self._port_range[1]}")
+
+    def reserve(self, owner: str, port: int):
+        """
+        Record a port the caller binds itself, e.g. a tunnel's proxy port, so claim() never hands it out. The port
+        may already be bound by the caller, it is not checked. Raises if another live owner holds the port.
+        """
+        with self._locked():
+            entries = self._load()
+            entry = entries.get(str(port))
+            if entry is not None and (entry.get("owner"), entry.get("pid")) != (owner, os.getpid()):
+                raise DBTunnelError(f"Port {port} is already held by {entry.get('owner')} "
+                                    f"(pid {entry.get('pid')})")
+            entries[str(port)] = {"owner": owner, "pid": os.getpid(), "claimed_at": time.time()}
+            self._save(entries)
+
+    def release(self, port: int, owner: str):
+        """
+        Drop the entry for port, only if owner claimed it from this process.
+        """
+        with self._locked():
+            entries = self._load()
+            entry = entries.get(str(port), {})
+            if entry.get("pid") == os.getpid() and entry.get("owner") == owner:
+                del entries[str(port)]
+            self._save(entries)
+
+    def entries(self) -> Dict[int, Dict[str, Any]]:
+        with self._locked():
+            return {int(port): entry for port, entry in self._load().items()}
@@ -10,7 +10,7 @@ from typing import Optional, Literal, List
 
 import requests
 
-from dbtunnel.utils import execute
+from dbtunnel.utils import execute, spawn, ManagedProcess
 
 PRIVATE_SUBDOMAIN_PREFIX = "private-"
 
@@ -275,13 +275,22 @@ class DBTunnelRelayClient:
     def is_visitor_connection_error(stmt):
         return "start new visitor connection error" in stmt
 
-    def _run(self, cmd: List[str], output_func=None, success_callback=None) -> None:
+    def _make_line_handler(self, output_func, success_callback=None):
+        handle_line = self._make_stmt_handler(output_func, success_callback)
+
+        def on_lines(lines: List[str]):
+            for stmt in lines:
+                handle_line(stmt)
+
+        return on_lines
+
+    def _make_stmt_handler(self, output_func, success_callback=None):
         r = re.compile(r".*start error: proxy.*already exists.*")
-        env_copy = os.environ.copy()
-        for stmt in execute(cmd, env=env_copy):
+
+        def handle_stmt(stmt: str):
             stmt = self._sanitize_log(stmt)
             if stmt is None:
-                continue
+                return
             if self.has_relay_conn_started(stmt) and success_callback is not None:
                 success_callback()
             if r.match(stmt):
@@ -293,6 +302,14 @@ class DBTunnelRelayClient:
                 raise StandardProxyError(f"Visitor connection error. Please check with provider if your server is still up.")
             output_func(stmt.rstrip("\n"))
 
+        return handle_stmt
+
+    def _run(self, cmd: List[str], output_func=None, success_callback=None) -> None:
+        handle_stmt = self._make_stmt_handler(output_func, success_callback)
+        env_copy = os.environ.copy()
+        for stmt in execute(cmd, env=env_copy):
+            handle_stmt(stmt)
+
     def get_secret_cmd(self) -> List[str]:
         self.validate()
         if self._mode == 'ssh':
@@ -321,11 +338,15 @@ class DBTunnelRelayClient:
             cmd = self.get_secret_cmd()
             self._run(cmd, output_func, success_callback)
 
-    def run_as_thread(self, output_func=None, success_callback=None):
-        import threading
-        t = threading.Thread(target=self.run, args=(output_func, success_callback,))
-        t.start()
-        return t
+    def run_as_thread(self, output_func=None, success_callback=None) -> ManagedProcess:
+        """
+        Runs the relay in the background, its output is read by the shared log multiplexer instead of a thread
+        per relay. The returned process can be joined like the thread this used to return.
+        """
+        self.validate()
+        output_func = output_func or print
+        cmd = self.get_secret_cmd() if self._secret is True else self._get_cmd()
+        return spawn(cmd, os.environ.copy(), self._make_line_handler(output_func, success_callback))
 
     def public_url(self):
         return f"https://{self._subdomain}.{self._app_host}"
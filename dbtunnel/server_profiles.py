@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Literal, Optional
+
+
+@dataclass
+class ServerProfile:
+    """
+    uvicorn settings for the apps served in process (fastapi, uvicorn, flask, dash, nicegui, shiny, gradio apps).
+    """
+    name: str = "default"
+    # concurrent connections and tasks before uvicorn answers 503, None is unlimited
+    limit_concurrency: Optional[int] = None
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    # largest request head h11 buffers, None keeps h11's default
+    h11_max_incomplete_event_size: Optional[int] = None
+    # uvloop can not be re-entered by nest_asyncio, it runs the server on a thread of its own
+    loop: Literal["asyncio", "uvloop"] = "asyncio"
+    http: Literal["auto", "h11", "httptools"] = "auto"
+
+    def uvicorn_kwargs(self) -> Dict[str, Any]:
+        kwargs = {"limit_concurrency": self.limit_concurrency,
+                  "backlog": self.backlog,
+                  "timeout_keep_alive": self.timeout_keep_alive,
+                  "loop": self.loop,
+                  "http": self.http}
+        if self.h11_max_incomplete_event_size is not None:
+            kwargs["h11_max_incomplete_event_size"] = self.h11_max_incomplete_event_size
+        return kwargs
+
+
+SERVER_PROFILES: Dict[str, ServerProfile] = {
+    "default": ServerProfile(),
+    # keep connections from the driver proxy open so requests do not wait on new tcp handshakes
+    "low-latency": ServerProfile(name="low-latency", backlog=256, timeout_keep_alive=75),
+    # deep accept queue, shed load with 503s instead of letting latency grow without bound
+    "high-throughput": ServerProfile(name="high-throughput", limit_concurrency=1000, backlog=4096,
+                                     timeout_keep_alive=30),
+    # long lived responses (server sent events, large downloads) and large request heads
+    "streaming": ServerProfile(name="streaming", timeout_keep_alive=300, h11_max_incomplete_event_size=64 * 1024),
+}
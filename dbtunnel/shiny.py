@@ -19,23 +19,8 @@ class ShinyPythonAppTunnel(DbTunnel):
     def _run(self):
         self.display()
         self._log.info("Starting server...")
-        import uvicorn
-        import nest_asyncio
-        nest_asyncio.apply()
-
-        async def start():
-            config = uvicorn.Config(
-                self._shiny_app,
-                host="0.0.0.0",
-                port=self._port,
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link: \n{self._proxy_settings.get_proxy_url(ensure_ends_with_slash=True)}")
-        asyncio.run(start())
+        self._serve_uvicorn(self._shiny_app)
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
@@ -1,5 +1,5 @@
 from dbtunnel.tunnels import DbTunnel
-from dbtunnel.utils import execute, process_file
+from dbtunnel.utils import process_file, kill_port
 
 
 class SolaraAppTunnel(DbTunnel):
@@ -23,15 +23,13 @@ class SolaraAppTunnel(DbTunnel):
     def _run(self):
         self.display()
         self._log.info("Starting server...")
-        self._log.info(f"Use this link: \n{self._proxy_settings.proxy_url}")
         with process_file(self._script_path) as file_path:
             self.run_solara(file_path, self._port)
 
     def run_solara(self, path, port):
         import os
-        import subprocess
         my_env = os.environ.copy()
-        subprocess.run(f"kill -9 $(lsof -t -i:{port})", capture_output=True, shell=True)
+        kill_port(port)
         # static assets otherwise get served by root and the root path is not allowed!
         self._log.info(f"Deploying {self._flavor} app at path: {path} on port: {port}")
         server_path_prefix = self._proxy_settings.url_base_path.rstrip('/')
@@ -47,6 +45,8 @@ class SolaraAppTunnel(DbTunnel):
                server_path_prefix,
                path,
             ]
+        startup = self._orchestrate(port, f"Use this link: \n{self._proxy_settings.proxy_url}")
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path)
+        self._supervise(cmd, my_env, app_port=port)
+
+        startup.wait()
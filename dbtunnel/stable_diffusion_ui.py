@@ -1,7 +1,7 @@
 import tempfile
 
 from dbtunnel.tunnels import DbTunnel
-from dbtunnel.utils import execute
+from dbtunnel.utils import kill_port
 
 
 class StableDiffusionUITunnel(DbTunnel):
@@ -56,14 +56,12 @@ class StableDiffusionUITunnel(DbTunnel):
             os.environ["COMMANDLINE_ARGS"] += f" {self._extra_flags}"
 
         import os
-        import subprocess
         my_env = os.environ.copy()
-        subprocess.run(f"kill -9 $(lsof -t -i:{self._port})", capture_output=True, shell=True)
+        kill_port(self._port)
 
         if self.shared is False:
             self._log.info(f"Deploying stable diffusion web ui app at path: \n{self._proxy_settings.proxy_url}")
 
         cmd = ["bash", script_path, "-f", "--listen"]
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path)
+        self._supervise(cmd, my_env, app_port=self._port)
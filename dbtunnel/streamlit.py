@@ -1,5 +1,5 @@
-from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
-from dbtunnel.utils import process_file, execute
+from dbtunnel.tunnels import DbTunnel
+from dbtunnel.utils import process_file
 from dbtunnel.vendor.asgiproxy.frameworks import Frameworks
 
 class StreamlitTunnel(DbTunnel):
@@ -27,37 +27,35 @@ class StreamlitTunnel(DbTunnel):
         import nest_asyncio
         nest_asyncio.apply()
 
-        streamlit_service_port = 9908
-        port = self._port
-        url_base_path = self._proxy_settings.url_base_path
+        streamlit_service_ports = self._claim_replica_ports(preferred=9908)
+        streamlit_service_port = streamlit_service_ports[0]
 
-        proxy_service = DbTunnelProxy(
-            proxy_port=port,
-            service_port=streamlit_service_port,
-            url_base_path=url_base_path,
-            framework=Frameworks.STREAMLIT,
-            token_auth=self._basic_tunnel_auth["token_auth"],
-            token_auth_workspace_url=self._basic_tunnel_auth["token_auth_workspace_url"],
-            cwd=None
-        )
-
-        proxy_service.start()
-
-        self._log.info(f"Use this link to access the Streamlit UI in Databricks: \n{self._proxy_settings.proxy_url}")
+        proxy_service = self._make_proxy(streamlit_service_port, Frameworks.STREAMLIT,
+                                         service_ports=streamlit_service_ports)
 
         with process_file(self._script_path) as file_path:
-            self.run_streamlit(file_path, streamlit_service_port)
+            startup = self._orchestrate(
+                streamlit_service_port,
+                f"Use this link to access the Streamlit UI in Databricks: \n{self._proxy_settings.proxy_url}",
+                health_path="/_stcore/health",
+                proxy=proxy_service)
+            import secrets
+            # one cookie secret so the xsrf cookie issued by one replica is accepted by the others
+            cookie_secret = secrets.token_hex(32) if len(streamlit_service_ports) > 1 else None
+            self._supervise_replicas(
+                lambda port: self._streamlit_command(file_path, port, cookie_secret=cookie_secret),
+                streamlit_service_ports, proxy=proxy_service)
 
-        proxy_service.wait()
+        startup.wait()
 
-    def run_streamlit(self, path, port):
+    def _streamlit_command(self, path, port, cookie_secret=None):
         import os
-        import subprocess
         my_env = os.environ.copy()
         my_env["STREAMLIT_SERVER_PORT"] = f"{port}"
         my_env["STREAMLIT_SERVER_ADDRESS"] = "0.0.0.0"
         my_env["STREAMLIT_SERVER_HEADLESS"] = "true"
-        subprocess.run(f"kill -9 $(lsof -t -i:{port})", capture_output=True, shell=True)
+        if cookie_secret is not None:
+            my_env.setdefault("STREAMLIT_SERVER_COOKIE_SECRET", cookie_secret)
 
         self._log.info(f"Deploying streamlit app at path: {path} on port: {port}")
         cmd = [
@@ -70,8 +68,7 @@ class StreamlitTunnel(DbTunnel):
             "none"
         ]
         self._log.info(f"Running command: {' '.join(cmd)}")
-        for path in execute(cmd, my_env):
-            self._log.info(path.rstrip("\n"))
+        return cmd, my_env
 
 
 def streamlit_patch_websockets_v2():
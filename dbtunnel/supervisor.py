@@ -0,0 +1,153 @@
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Callable, TYPE_CHECKING
+
+from dbtunnel.ports import is_port_open
+from dbtunnel.utils import log_lines, ManagedProcess
+
+if TYPE_CHECKING:
+    from dbtunnel.tunnels import DbTunnel, DbTunnelProxy
+
+
+@dataclass
+class SupervisorSettings:
+    enabled: bool = True
+    # restarts allowed in a row before giving up, None restarts forever
+    max_restarts: Optional[int] = 5
+    backoff_initial: float = 1.0
+    backoff_max: float = 60.0
+    # a run that lasted this long resets the backoff and the restart count
+    stable_after: float = 60.0
+    # seconds between liveness probes of the app port, None disables them
+    liveness_interval: Optional[float] = 10.0
+    # consecutive failed probes after which a hung app is killed and restarted
+    liveness_failures: int = 3
+
+
+class AppSupervisor:
+    """
+    Runs an app command through `spawn`, restarting it with exponential backoff when it crashes and killing it
+    when it stops answering on its port. The proxy, if there is one, is told while the app is down so it holds
+    requests instead of returning 502s.
+    """
+
+    def __init__(self,
+                 tunnel: "DbTunnel",
+                 cmd: List[str],
+                 env: Dict[str, str],
+                 *,
+                 cwd: Optional[str] = None,
+                 shell: bool = False,
+                 app_port: Optional[int] = None,
+                 proxy: Optional["DbTunnelProxy"] = None,
+                 settings: Optional[SupervisorSettings] = None,
+                 on_lines: Optional[Callable[[List[str]], None]] = None,
+                 role: str = "app"):
+        self._tunnel = tunnel
+        # name of the app process in resource_usage(), replicas are app-0, app-1, ...
+        self._role = role
+        self._log = tunnel._log
+        self._cmd = cmd
+        self._env = env
+        self._cwd = cwd
+        self._shell = shell
+        self._app_port = app_port
+        self._proxy = proxy
+        self._settings = settings or SupervisorSettings()
+        self._on_lines = on_lines or log_lines(self._log)
+        self._process: Optional[ManagedProcess] = None
+        self._stopped = threading.Event()
+        self.restarts = 0
+
+    def _set_upstream_available(self, available: bool):
+        if self._proxy is not None:
+            self._proxy.set_upstream_available(available)
+
+    def _readiness(self, process: ManagedProcess, interval: float = 0.25):
+        # reopen the proxy gate as soon as this run accepts connections, independent of the liveness probes
+        while not self._stopped.is_set() and process.poll() is None:
+            if is_port_open("127.0.0.1", self._app_port, timeout=interval):
+                self._set_upstream_available(True)
+                return
+            self._stopped.wait(interval)
+
+    def _liveness(self, process: ManagedProcess):
+        failures = 0
+        seen_listening = False
+        while not self._stopped.wait(self._settings.liveness_interval) and process.poll() is None:
+            if is_port_open("127.0.0.1", self._app_port):
+                seen_listening = True
+                failures = 0
+                continue
+            # still booting, the startup orchestrator covers that phase
+            if not seen_listening:
+                continue
+            failures += 1
+            if failures >= self._settings.liveness_failures:
+                self._log.warning(f"{self._tunnel._flavor} has not answered on port {self._app_port} for "
+                                  f"{failures} probes; killing it so it gets restarted")
+                self._set_upstream_available(False)
+                process.kill()
+                return
+
+    def _run_once(self):
+        self._process = self._tunnel._launch(self._cmd, self._env, self._on_lines, cwd=self._cwd, shell=self._shell,
+                                             role=self._role)
+        if self._app_port is not None and self._proxy is not None:
+            threading.Thread(target=self._readiness, args=(self._process,), daemon=True,
+                             name=f"dbtunnel-readiness-{self._app_port}").start()
+        if self._app_port is not None and self._settings.liveness_interval:
+            threading.Thread(target=self._liveness, args=(self._process,), daemon=True,
+                             name=f"dbtunnel-liveness-{self._app_port}").start()
+        return_code = self._process.wait()
+        if return_code:
+            raise subprocess.CalledProcessError(return_code, self._cmd)
+
+    def run(self):
+        if not self._settings.enabled:
+            return self._run_once()
+        backoff = self._settings.backoff_initial
+        while True:
+            started_at = time.monotonic()
+            try:
+                self._run_once()
+                self._log.info(f"{self._tunnel._flavor} exited cleanly, not restarting")
+                return
+            except subprocess.CalledProcessError as e:
+                if self._stopped.is_set():
+                    return
+                self._set_upstream_available(False)
+                if time.monotonic() - started_at >= self._settings.stable_after:
+                    backoff = self._settings.backoff_initial
+                    self.restarts = 0
+                if self._settings.max_restarts is not None and self.restarts >= self._settings.max_restarts:
+                    self._log.error(f"{self._tunnel._flavor} crashed {self.restarts + 1} times in a row, giving up")
+                    raise
+                self.restarts += 1
+                self._log.warning(f"{self._tunnel._flavor} exited with code {e.returncode}; restarting in "
+                                  f"{backoff:.1f}s (restart {self.restarts})")
+                if self._stopped.wait(backoff):
+                    return
+                backoff = min(backoff * 2, self._settings.backoff_max)
+            except BaseException:
+                # KeyboardInterrupt from the notebook cell, do not leave the app running
+                self.stop()
+                raise
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the app without restarting it. With a timeout the app gets SIGTERM and that long to exit before it is
+        killed.
+        """
+        self._stopped.set()
+        process = self._process
+        if process is None or process.poll() is not None:
+            return
+        if timeout:
+            process.terminate()
+            if process.wait(timeout) is not None:
+                return
+            self._log.warning(f"{self._tunnel._flavor} did not exit within {timeout}s of SIGTERM; killing it")
+        process.kill()
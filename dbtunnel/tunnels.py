@@ -3,19 +3,25 @@ import datetime
 import json
 import logging
 import os
+import subprocess
 import threading
-from dataclasses import dataclass
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
-from typing import Dict, Any, Literal, Optional
+from typing import Dict, Any, Literal, Optional, List, Callable, Tuple
 from urllib.parse import urlparse
 
-from databricks.sdk import WorkspaceClient
-
-from dbtunnel.utils import pkill, ctx, get_logger, execute
-
-
-class DBTunnelError(Exception):
-    pass
+from dbtunnel.errors import DBTunnelError
+from dbtunnel.monitor import ResourceMonitor
+from dbtunnel.orchestrator import StartupOrchestrator
+from dbtunnel.ports import PortRegistry, is_port_open
+from dbtunnel.server_profiles import ServerProfile, SERVER_PROFILES
+from dbtunnel.supervisor import AppSupervisor, SupervisorSettings
+from dbtunnel.utils import pkill, get_ctx, get_logger, spawn, log_lines, ManagedProcess
+from dbtunnel.vendor.asgiproxy.settings import WebSocketSettings
+from dbtunnel.warm_pool import get_warm_pool, _warm_launch_spec
+from dbtunnel.wsgi_workers import WsgiWorkerSettings, gunicorn_options, gunicorn_command, _run_gunicorn
 
 
 @dataclass
@@ -69,7 +75,7 @@ def get_cloud_proxy_settings(cloud: str, org_id: str, cluster_id: str, port: int
         "azure": "azuredatabricks.net",
     }
     if cloud_norm == "aws":
-        suffix = remove_lowest_subdomain_from_host(ctx.host)
+        suffix = remove_lowest_subdomain_from_host(get_ctx().host)
         suffix_url_settings["aws"] = suffix
 
     org_shard = ""
@@ -96,7 +102,7 @@ Flavor = Literal[
 
 
 def get_current_username() -> str:
-    return ctx.current_user_name
+    return get_ctx().current_user_name
 
 
 def extract_hostname(url):
@@ -117,10 +123,13 @@ class DbTunnel(abc.ABC):
     def __init__(self, port: int, flavor: Flavor):
         self._port = port
         self._flavor = flavor
+        self._startup_timings: Dict[str, float] = {}
+        context_started_at = time.monotonic()
         import IPython
         self._dbutils = IPython.get_ipython().user_ns["dbutils"]
         self._display_html = IPython.get_ipython().user_ns["displayHTML"]
         self._context = json.loads(self._dbutils.notebook.entry_point.getDbutils().notebook().getContext().toJson())
+        self._record_phase("context", time.monotonic() - context_started_at)
         self._org_id = self._context["tags"]["orgId"]
         self._cluster_id = self._context["tags"]["clusterId"]
         # need to do this after the context is set
@@ -133,8 +142,29 @@ class DbTunnel(abc.ABC):
         self._share_trigger_callback = None
         self._log: logging.Logger = get_logger()  # initialize logger during the run method
         self._basic_tunnel_auth = {"token_auth": False, "token_auth_workspace_url": None}
+        self._websocket_settings = WebSocketSettings()
+        self._proxy_mode = "embedded"
+        self._port_registry = PortRegistry()
+        self._supervisor_settings = SupervisorSettings()
+        self._service_ports = []
+        self._warm_pool: Optional[WarmInterpreterPool] = None
+        # "cold", or "warm" with the seconds of imports the warm interpreter did ahead of the launch
+        self._launch_mode: Optional[str] = None
+        self._warm_import_seconds: Optional[float] = None
+        from dbtunnel.vendor.asgiproxy.control import default_metrics_path
+        self._resource_monitor = ResourceMonitor(default_metrics_path(self._port))
+        self._proxies: List["DbTunnelProxy"] = []
+        self._supervisors: List[AppSupervisor] = []
+        self._replicas = 1
+        self._server_profile = SERVER_PROFILES["default"]
+        self._wsgi_workers: Optional[WsgiWorkerSettings] = None
+        self._wsgi_process = None
+        self._uvicorn_server = None
+        self._uvicorn_stopped: Optional[threading.Event] = None
+        self._uvicorn_thread: Optional[threading.Thread] = None
 
     def _is_single_user_cluster(self):
+        from databricks.sdk import WorkspaceClient
         ws = WorkspaceClient()
         cluster = ws.clusters.get(self._cluster_id)
         from databricks.sdk.service.compute import DataSecurityMode
@@ -157,6 +187,79 @@ class DbTunnel(abc.ABC):
     def shared(self):
         return self._share
 
+    def _record_phase(self, phase: str, seconds: float):
+        self._startup_timings[phase] = seconds
+
+    @contextmanager
+    def _timed_phase(self, phase: str):
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_phase(phase, time.monotonic() - started_at)
+
+    def startup_timings(self) -> Dict[str, float]:
+        """
+        Seconds spent in each startup phase: context, imports, install, proxy, warm_pool_wait, bind and first_200.
+        bind and first_200 are measured from the moment the app process is launched.
+        """
+        return dict(self._startup_timings)
+
+    def format_startup_timings(self) -> str:
+        timings = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in self._startup_timings.items())
+        if self._launch_mode == "warm":
+            return f"warm start, {self._warm_import_seconds:.2f}s of imports done ahead: {timings}"
+        if self._launch_mode == "cold":
+            return f"cold start: {timings}"
+        return timings
+
+    def _track_process(self, role: str, pid: Optional[int], shared: bool = False):
+        self._resource_monitor.track(role, pid, shared=shared)
+
+    def resource_usage(self) -> Dict[str, Any]:
+        """
+        Current RSS, cpu time (and cpu percent since the previous sample), open fds and threads of the app and the
+        proxy processes this tunnel started, each summed over its children. Apps and proxies running inside the
+        notebook process are not included. The proxy daemon serves every tunnel on the driver, in daemon mode the
+        proxy is marked "shared" and is not counted in the total.
+        """
+        return self._resource_monitor.sample()
+
+    def with_resource_monitor(self, interval: Optional[float] = 15.0):
+        """
+        How often resource usage is sampled for the proxy's /dbtunnel/metrics endpoint, None turns the background
+        sampling off. resource_usage() still works either way.
+        """
+        self._resource_monitor.interval = interval
+        return self
+
+    @property
+    def _port_owner(self) -> str:
+        return f"{self._flavor}:{self._port}"
+
+    def _claim_service_port(self, preferred: Optional[int] = None) -> int:
+        """
+        Port for the app behind the proxy, released again when run() returns.
+        """
+        port = self._port_registry.claim(self._port_owner, preferred=preferred)
+        self._service_ports.append(port)
+        self._log.info(f"Claimed service port: {port}")
+        return port
+
+    def _reserve_tunnel_port(self):
+        # the proxy (or the app itself when there is no proxy) binds the tunnel port, keep it away from other apps
+        self._port_registry.reserve(self._port_owner, self._port)
+        self._service_ports.append(self._port)
+
+    def _release_service_ports(self):
+        while self._service_ports:
+            self._port_registry.release(self._service_ports.pop(), self._port_owner)
+
+    def _orchestrate(self, app_port: int, message: str, *, health_path: str = "/",
+                     proxy: Optional["DbTunnelProxy"] = None) -> StartupOrchestrator:
+        return StartupOrchestrator(self, app_port=app_port, message=message, health_path=health_path,
+                                   proxy=proxy).start()
+
     def ui_url(self):
         self._display_html(f'<a href="{self._proxy_settings.proxy_url}">Click to go to {self._flavor} App!</a>')
 
@@ -170,10 +273,10 @@ class DbTunnel(abc.ABC):
         """
         if os.getenv("DATABRICKS_HOST") is None:
             self._log.info("Setting databricks host from context")
-            os.environ["DATABRICKS_HOST"] = host or ensure_scheme(ctx.host)
+            os.environ["DATABRICKS_HOST"] = host or ensure_scheme(get_ctx().host)
         if os.getenv("DATABRICKS_TOKEN") is None:
             self._log.info("Setting databricks token from context")
-            os.environ["DATABRICKS_TOKEN"] = token or ctx.token
+            os.environ["DATABRICKS_TOKEN"] = token or get_ctx().token
 
         if write_cfg is True and self._is_single_user_cluster():
             expanded_file_path = os.path.expanduser("~/.databrickscfg")
@@ -193,11 +296,11 @@ class DbTunnel(abc.ABC):
         if os.getenv("DATABRICKS_SERVER_HOSTNAME") is None:
             self._log.info("Setting databricks server hostname from context")
             os.environ["DATABRICKS_SERVER_HOSTNAME"] = server_hostname or extract_hostname(
-                ctx.host)
+                get_ctx().host)
 
         if os.getenv("DATABRICKS_TOKEN") is None:
             self._log.info("Setting databricks token from context")
-            os.environ["DATABRICKS_TOKEN"] = token or ctx.token
+            os.environ["DATABRICKS_TOKEN"] = token or get_ctx().token
 
         if os.getenv("DATABRICKS_HTTP_PATH") is None:
             self._log.info("Setting databricks warehouse http path")
@@ -229,7 +332,323 @@ class DbTunnel(abc.ABC):
         """
 
         self._basic_tunnel_auth["token_auth"] = True
-        self._basic_tunnel_auth["token_auth_workspace_url"] = ctx.host
+        self._basic_tunnel_auth["token_auth_workspace_url"] = get_ctx().host
+        return self
+
+    def with_websocket_settings(self, **kwargs):
+        """
+        Tune how the dbtunnel proxy handles websockets for frameworks that run behind it (streamlit, gradio, chainlit,
+        arize phoenix).
+
+        Example usage:
+        dbtunnel.streamlit("path/to/script").with_websocket_settings(upstream_compression=15).run()
+
+        :param kwargs: any field of WebSocketSettings, e.g. client_compression, upstream_compression
+        :return:
+        """
+        for k, v in kwargs.items():
+            if not hasattr(self._websocket_settings, k):
+                raise ValueError(f"Unknown websocket setting: {k}")
+            setattr(self._websocket_settings, k, v)
+        return self
+
+    def with_proxy_mode(self, mode: Literal["embedded", "subprocess", "daemon"]):
+        """
+        Choose how the dbtunnel proxy runs for frameworks that need one (streamlit, gradio, chainlit, arize phoenix).
+
+        :param mode: embedded runs the proxy on a background thread of the notebook process, subprocess runs it as
+            `python -m dbtunnel.vendor.asgiproxy`, daemon registers a route with the proxy daemon shared by every
+            app on the driver (started on first use). Embedded and daemon fall back to subprocess if they can not be
+            started.
+        :return:
+        """
+        if mode not in ["embedded", "subprocess", "daemon"]:
+            raise ValueError(f"Unknown proxy mode: {mode}")
+        self._proxy_mode = mode
+        return self
+
+    def with_supervisor(self, **kwargs):
+        """
+        Tune how subprocess based apps (streamlit, gradio from a path, chainlit, arize phoenix, bokeh, solara,
+        code-server) are restarted when they crash or stop responding.
+
+        Example usage:
+        dbtunnel.streamlit("path/to/script").with_supervisor(max_restarts=None, backoff_max=30).run()
+
+        :param kwargs: any field of SupervisorSettings, enabled=False runs the app once like before
+        :return:
+        """
+        for k, v in kwargs.items():
+            if not hasattr(self._supervisor_settings, k):
+                raise ValueError(f"Unknown supervisor setting: {k}")
+            setattr(self._supervisor_settings, k, v)
+        return self
+
+    def with_server_profile(self, name: Literal["default", "low-latency", "high-throughput", "streaming"] = "default",
+                            **overrides):
+        """
+        Tune the uvicorn server of apps that dbtunnel serves in process (fastapi, uvicorn, flask, dash, nicegui,
+        shiny and gradio apps passed as objects).
+
+        Example usage:
+        dbtunnel.fastapi(app).with_server_profile("high-throughput", limit_concurrency=200).run()
+
+        :param name: preset to start from, see SERVER_PROFILES
+        :param overrides: any field of ServerProfile, e.g. backlog, timeout_keep_alive, loop="uvloop"
+        :return:
+        """
+        if name not in SERVER_PROFILES:
+            raise ValueError(f"Unknown server profile: {name}; choose one of {', '.join(SERVER_PROFILES)}")
+        known = {f.name for f in fields(ServerProfile)}
+        for k in overrides:
+            if k not in known:
+                raise ValueError(f"Unknown server profile setting: {k}")
+        self._server_profile = replace(SERVER_PROFILES[name], **overrides)
+        return self
+
+    def _uvicorn_config(self, app, **kwargs):
+        """
+        uvicorn config for serving app in process on the tunnel port with the server profile applied.
+        """
+        import uvicorn
+        return uvicorn.Config(app, host="0.0.0.0", port=self._port, **{**self._server_profile.uvicorn_kwargs(),
+                                                                        **kwargs})
+
+    def _serve_uvicorn(self, app, **kwargs):
+        """
+        Serve app in process until it is stopped, blocking like the cell would with uvicorn.run.
+        """
+        import asyncio
+        import uvicorn
+        config = self._uvicorn_config(app, **kwargs)
+        server = uvicorn.Server(config)
+        # stop() asks the server to exit and waits for this event
+        self._uvicorn_server = server
+        self._uvicorn_stopped = threading.Event()
+        self._uvicorn_thread = threading.current_thread()
+        self._log.info(f"Serving {self._flavor} with the {self._server_profile.name} server profile")
+        if config.loop != "uvloop":
+            import nest_asyncio
+            nest_asyncio.apply()
+            try:
+                # Run the asyncio event loop instead of uvloop to enable re entrance
+                asyncio.run(server.serve())
+            finally:
+                self._uvicorn_stopped.set()
+            return
+        import uvloop
+
+        def serve():
+            loop = uvloop.new_event_loop()
+            try:
+                loop.run_until_complete(server.serve())
+            finally:
+                loop.close()
+                self._uvicorn_stopped.set()
+
+        thread = threading.Thread(target=serve, name=f"dbtunnel-uvicorn-{self._port}", daemon=True)
+        self._uvicorn_thread = thread
+        thread.start()
+        try:
+            while thread.is_alive():
+                thread.join(0.5)
+        except KeyboardInterrupt:
+            server.should_exit = True
+            thread.join()
+            raise
+
+    def with_wsgi_workers(self, workers: int = 2, threads: int = 1, app_ref: Optional[str] = None,
+                          timeout: int = 120, fork: bool = False):
+        """
+        Serve flask and dash apps with gunicorn worker processes instead of a single uvicorn process, so cpu heavy
+        requests and callbacks do not queue behind each other on one GIL. Requires gunicorn.
+
+        Example usage:
+        dbtunnel.dash(app).with_wsgi_workers(workers=4, threads=2, app_ref="my_app:app").run()
+
+        :param workers: worker processes
+        :param threads: threads per worker
+        :param app_ref: "module:app" for gunicorn to import in each worker, the module must be importable from the
+            notebook's working directory or sys.path
+        :param timeout: seconds a worker may spend on a request before gunicorn restarts it
+        :param fork: fork gunicorn off the app object passed to dbtunnel instead of importing app_ref. Warning: the
+            notebook process runs many threads (the log pipeline, the embedded proxy, the IPython kernel) and a
+            forked child inherits any lock one of them held at the time, e.g. a logging handler lock, which can
+            deadlock the workers. Only use it for apps that can not be imported from a module.
+        :return:
+        """
+        if workers < 1 or threads < 1:
+            raise ValueError("workers and threads must be at least 1")
+        if app_ref is None and not fork:
+            raise ValueError("with_wsgi_workers needs app_ref='module:app' for the workers to import, or fork=True "
+                             "to fork them off the app object in the notebook")
+        self._wsgi_workers = WsgiWorkerSettings(workers=workers, threads=threads, app_ref=app_ref, timeout=timeout,
+                                                fork=fork and app_ref is None)
+        return self
+
+    def _serve_wsgi_workers(self, wsgi_app, env: Optional[Dict[str, str]] = None):
+        """
+        Serve wsgi_app with gunicorn until it is stopped. env is set in every worker, e.g. SCRIPT_NAME so the app
+        generates urls under the driver proxy prefix.
+        """
+        options = gunicorn_options(self._wsgi_workers, self._port, self._server_profile, env or {})
+        self._log.info(f"Serving {self._flavor} with {options['workers']} gunicorn workers of "
+                       f"{options['threads']} threads")
+        if not self._wsgi_workers.fork:
+            cmd = gunicorn_command(options, self._wsgi_workers.app_ref)
+            self._supervise(cmd, os.environ.copy(), app_port=self._port)
+            return
+        import multiprocessing
+        # explicit opt in, see the warning on with_wsgi_workers
+        self._log.warning(f"Forking gunicorn off the notebook process for {self._flavor}; pass app_ref to "
+                          f"with_wsgi_workers to run it as a separate process instead")
+        self._wsgi_process = multiprocessing.get_context("fork").Process(target=_run_gunicorn,
+                                                                         args=(wsgi_app, options),
+                                                                         name=f"dbtunnel-gunicorn-{self._port}",
+                                                                         daemon=True)
+        self._wsgi_process.start()
+        self._track_process("app", self._wsgi_process.pid)
+        try:
+            while self._wsgi_process.is_alive():
+                self._wsgi_process.join(0.5)
+        except KeyboardInterrupt:
+            self._wsgi_process.terminate()
+            self._wsgi_process.join()
+            raise
+        if self._wsgi_process.exitcode:
+            raise subprocess.CalledProcessError(self._wsgi_process.exitcode, "gunicorn")
+
+    def with_warm_pool(self, modules: List[str], size: int = 1):
+        """
+        Launch the app from an interpreter that already imported the given modules. The pool starts warming up
+        right away and is kept for the life of the notebook, so restarts and reruns of the same app start warm too.
+        Applies to apps launched as a python script or a python console script (streamlit, gradio from a path,
+        chainlit).
+
+        Example usage:
+        dbtunnel.streamlit("path/to/script").with_warm_pool(["streamlit.web.cli", "pandas"]).run()
+
+        :param modules: modules to import ahead of time, usually the framework and the app's heavy dependencies
+        :param size: interpreters kept warm
+        :return:
+        """
+        self._warm_pool = get_warm_pool(modules, size=size)
+        return self
+
+    def _launch(self, cmd: List[str], env: Dict[str, str], on_lines: Callable[[List[str]], None], *,
+                cwd: Optional[str] = None, shell: bool = False, role: str = "app") -> ManagedProcess:
+        spec = _warm_launch_spec(cmd) if self._warm_pool is not None and not shell else None
+        interpreter = None
+        if spec is not None:
+            with self._timed_phase("warm_pool_wait"):
+                interpreter = self._warm_pool.acquire()
+        if interpreter is not None:
+            for failure in interpreter.failed_imports:
+                self._log.warning(f"Warm interpreter could not import {failure}")
+            try:
+                process = interpreter.launch(spec, env, on_lines, cwd=cwd)
+                self._launch_mode = "warm"
+                self._warm_import_seconds = interpreter.import_seconds
+                self._log.info(f"Launched {self._flavor} from warm interpreter {process.pid}")
+                self._track_process(role, process.pid)
+                return process
+            except DBTunnelError as e:
+                self._log.warning(f"{e}; starting {self._flavor} cold")
+        self._launch_mode = "cold"
+        process = spawn(cmd, env, on_lines, cwd=cwd, shell=shell)
+        self._track_process(role, process.pid)
+        return process
+
+    def _supervise(self, cmd: List[str], env: Dict[str, str], *, cwd: Optional[str] = None, shell: bool = False,
+                   app_port: Optional[int] = None, proxy: Optional["DbTunnelProxy"] = None, role: str = "app"):
+        supervisor = AppSupervisor(self, cmd, env, cwd=cwd, shell=shell, app_port=app_port, proxy=proxy,
+                                   settings=self._supervisor_settings, role=role)
+        self._supervisors.append(supervisor)
+        supervisor.run()
+
+    def with_replicas(self, replicas: int):
+        """
+        Run several processes of the app (streamlit, gradio from a path) behind one proxy so sessions are spread
+        across cores. Each session sticks to one replica through a cookie or the databricks user id, new sessions
+        go to the replica with the fewest connections and replicas that stop answering are taken out of rotation.
+
+        Example usage:
+        dbtunnel.streamlit("path/to/script").with_replicas(4).run()
+
+        :param replicas: number of app processes
+        :return:
+        """
+        if replicas < 1:
+            raise ValueError("replicas must be at least 1")
+        self._replicas = replicas
+        return self
+
+    def _claim_replica_ports(self, preferred: Optional[int] = None) -> List[int]:
+        return [self._claim_service_port(preferred=preferred) for _ in range(self._replicas)]
+
+    def _supervise_replicas(self, launch: Callable[[int], Tuple[List[str], Dict[str, str]]], ports: List[int], *,
+                            cwd: Optional[str] = None, proxy: Optional["DbTunnelProxy"] = None):
+        """
+        Supervise one app process per port, launch returns the command and environment for a port. Blocks until
+        all of them have exited.
+        """
+        if len(ports) == 1:
+            cmd, env = launch(ports[0])
+            self._supervise(cmd, env, cwd=cwd, app_port=ports[0], proxy=proxy)
+            return
+        errors = []
+
+        def supervise(index: int, port: int):
+            cmd, env = launch(port)
+            try:
+                # no proxy, its readiness gate is shared by all replicas; the pool ejects a replica that is down
+                self._supervise(cmd, env, cwd=cwd, app_port=port, role=f"app-{index}")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=supervise, args=(index, port), name=f"dbtunnel-replica-{port}",
+                                    daemon=True) for index, port in enumerate(ports)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            for supervisor in self._supervisors:
+                supervisor.stop()
+            raise
+        if errors:
+            raise errors[0]
+
+    def stop(self, timeout: float = 30.0):
+        """
+        Gracefully stop the tunnel from another cell or thread: the proxy stops accepting connections, lets in flight
+        requests finish and closes websockets with 1001 (going away), then the app gets SIGTERM and is only killed
+        if it is still running after timeout seconds. Apps served in process by uvicorn (fastapi, uvicorn, flask,
+        dash, nicegui, shiny, gradio apps) are asked to exit and get timeout seconds to finish their requests.
+
+        :param timeout: seconds allowed for each of draining the proxy and stopping the app
+        :return:
+        """
+        for proxy in self._proxies:
+            proxy.stop(timeout)
+        for supervisor in self._supervisors:
+            supervisor.stop(timeout)
+        if self._uvicorn_server is not None and not self._uvicorn_stopped.is_set():
+            self._uvicorn_server.config.timeout_graceful_shutdown = timeout
+            self._uvicorn_server.should_exit = True
+            # called from a request handler the server can not finish while we block its thread
+            serving_here = threading.current_thread() is self._uvicorn_thread
+            if not serving_here and not self._uvicorn_stopped.wait(timeout + 5):
+                self._log.warning(f"{self._flavor} did not stop within {timeout}s")
+        if self._wsgi_process is not None and self._wsgi_process.is_alive():
+            # gunicorn shuts its workers down gracefully on SIGTERM
+            self._wsgi_process.terminate()
+            self._wsgi_process.join(timeout)
+            if self._wsgi_process.is_alive():
+                self._wsgi_process.kill()
+        self._log.info(f"Stopped {self._flavor}")
         return self
 
     def with_custom_logger(self, *,
@@ -242,7 +661,11 @@ class DbTunnel(abc.ABC):
                            backup_count: int = 3,
                            at_time: Optional[datetime.time] = None,
                            format_str: str = "[%(asctime)s] [%(levelname)s] {%(module)s.py:%(funcName)s:%(lineno)d} - %(message)s",
-                           datefmt_str: str = "%Y-%m-%dT%H:%M:%S%z"
+                           datefmt_str: str = "%Y-%m-%dT%H:%M:%S%z",
+                           queue_size: int = 1000,
+                           overflow_policy: Literal["drop-oldest", "sample"] = "drop-oldest",
+                           sample_every: int = 10,
+                           archive_compression: Optional[Literal["gzip", "zstd", "none"]] = None,
                            ):
         if logger is not None:
             self._log = logger
@@ -255,9 +678,30 @@ class DbTunnel(abc.ABC):
                                backup_count=backup_count,
                                at_time=at_time,
                                format_str=format_str,
-                               datefmt_str=datefmt_str)
+                               datefmt_str=datefmt_str,
+                               queue_size=queue_size,
+                               overflow_policy=overflow_policy,
+                               sample_every=sample_every,
+                               archive_compression=archive_compression)
         return self
 
+    def _make_proxy(self, service_port: int, framework: str, cwd: Optional[str] = None,
+                    service_ports: Optional[List[int]] = None) -> "DbTunnelProxy":
+        proxy = DbTunnelProxy(
+            proxy_port=self._port,
+            service_port=service_port,
+            service_ports=service_ports,
+            url_base_path=self._proxy_settings.url_base_path,
+            framework=framework,
+            token_auth=self._basic_tunnel_auth["token_auth"],
+            token_auth_workspace_url=self._basic_tunnel_auth["token_auth_workspace_url"],
+            cwd=cwd,
+            websocket_settings=self._websocket_settings,
+            mode=self._proxy_mode,
+        )
+        self._proxies.append(proxy)
+        return proxy
+
     def _validate_options(self):
         if self._share is True and self._basic_tunnel_auth["token_auth"] is True:
             raise DBTunnelError("Cannot use token auth with shared tunnel; remove token auth or remove sharing")
@@ -270,7 +714,8 @@ class DbTunnel(abc.ABC):
         3. Then spawn processes.
         :return:
         """
-        self._imports()
+        with self._timed_phase("imports"):
+            self._imports()
         self._validate_options()
         if self._share is True and self._share_trigger_callback is not None:
             import nest_asyncio
@@ -278,7 +723,12 @@ class DbTunnel(abc.ABC):
             self._share_trigger_callback()
         if self._share is True and self._share_information is not None:
             self._log.info(f"Use this information to publicly access your app: \n{self._share_information.public_url}")
-        self._run()
+        try:
+            self._reserve_tunnel_port()
+            self._run()
+        finally:
+            self._release_service_ports()
+            self._resource_monitor.stop()
 
     def share_to_internet(self,
                           *,
@@ -298,7 +748,7 @@ class DbTunnel(abc.ABC):
             local_port=self._port,
             subdomain=subdomain,
             sso=sso,
-            user=ctx.current_user_name
+            user=get_ctx().current_user_name
         )
         print("Downloading required binary if it does not exist!")
         dbtunnel_relay_client.download_on_linux()
@@ -363,45 +813,172 @@ class DbTunnelProxy:
                  framework: str,
                  token_auth: bool = False,
                  token_auth_workspace_url: Optional[str] = None,
-                 cwd: str = None):
+                 cwd: str = None,
+                 websocket_settings: Optional[WebSocketSettings] = None,
+                 mode: Literal["embedded", "subprocess", "daemon"] = "embedded",
+                 service_ports: Optional[List[int]] = None):
         self._proxy_port = proxy_port
         self._service_port = service_port
+        # every replica of the app, the proxy balances across them when there is more than one
+        self._service_ports = service_ports or [service_port]
         self._url_base_path = url_base_path
         self._framework = framework
         self._token_auth = token_auth
         self._token_auth_workspace_url = token_auth_workspace_url
         self._cwd = cwd
+        self._websocket_settings = websocket_settings
         self._log: logging.Logger = get_logger(app_name="dbtunnel-proxy")
-        self._thread = self._make_thread()
-
-    def _make_thread(self):
-        my_env = os.environ.copy()
-
-        def run_uvicorn_app(env_copy):
-            proxy_cmd = ["python", "-m", "dbtunnel.vendor.asgiproxy",
-                         "--port", str(self._proxy_port),
-                         "--service-port", str(self._service_port),
-                         "--url-base-path", self._url_base_path,
-                         "--framework", self._framework]
-            if self._token_auth is True:
-                proxy_cmd.append("--token-auth")
-            if self._token_auth_workspace_url is not None:
-                proxy_cmd.append("--token-auth-workspace-url")
-                proxy_cmd.append(self._token_auth_workspace_url)
-
-            self._log.info(f"Running proxy server via command: {' '.join(proxy_cmd)}")
-            try:
-                for log_stmt in execute(proxy_cmd, env_copy, cwd=self._cwd):
-                    self._log.info(log_stmt.rstrip("\n"))
-            except Exception as e:
-                self._log.info("Error running proxy server")
+        self._mode = mode
+        self._embedded_server = None
+        self._process: Optional[ManagedProcess] = None
+        self._daemon_client = None
 
-        return threading.Thread(target=run_uvicorn_app, args=(my_env,))
+    @property
+    def proxy_port(self) -> int:
+        return self._proxy_port
+
+    @property
+    def shared(self) -> bool:
+        """
+        True when the proxy is the daemon shared by every tunnel on the driver.
+        """
+        return self._daemon_client is not None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """
+        Pid of the process serving the proxy, None when it runs inside the notebook process.
+        """
+        if self._process is not None:
+            return self._process.pid
+        if self._daemon_client is not None:
+            from dbtunnel.vendor.asgiproxy.control import ProxyDaemonError
+            try:
+                return self._daemon_client.request("ping")["pid"]
+            except (OSError, ProxyDaemonError, ValueError):
+                return None
+        return None
+
+    def _make_embedded_server(self):
+        # imported lazily, these are only needed once a proxy is actually started
+        from dbtunnel.vendor.asgiproxy.server import EmbeddedProxyServer, make_proxy_context, \
+            make_proxy_server_config
+        proxy_context = make_proxy_context(framework=self._framework,
+                                           url_base_path=self._url_base_path,
+                                           service_host="0.0.0.0",
+                                           service_port=self._service_port,
+                                           token_auth=self._token_auth,
+                                           token_auth_workspace_url=self._token_auth_workspace_url,
+                                           websocket_settings=self._websocket_settings,
+                                           service_ports=self._service_ports)
+        config = make_proxy_server_config(proxy_context,
+                                          framework=self._framework,
+                                          host="0.0.0.0",
+                                          port=self._proxy_port,
+                                          url_base_path=self._url_base_path)
+        # send the proxy's own logs (websocket closures etc.) to the proxy logger instead of the root logger
+        proxy_lib_logger = logging.getLogger("dbtunnel.vendor.asgiproxy")
+        proxy_lib_logger.handlers = list(self._log.handlers)
+        proxy_lib_logger.setLevel(logging.INFO)
+        proxy_lib_logger.propagate = False
+        return EmbeddedProxyServer(config, proxy_context)
+
+    def _spawn_subprocess(self) -> ManagedProcess:
+        proxy_cmd = ["python", "-m", "dbtunnel.vendor.asgiproxy",
+                     "--port", str(self._proxy_port),
+                     "--service-port", *[str(port) for port in self._service_ports],
+                     "--url-base-path", self._url_base_path,
+                     "--framework", self._framework]
+        if self._token_auth is True:
+            proxy_cmd.append("--token-auth")
+        if self._token_auth_workspace_url is not None:
+            proxy_cmd.append("--token-auth-workspace-url")
+            proxy_cmd.append(self._token_auth_workspace_url)
+        if self._websocket_settings is not None:
+            proxy_cmd.append("--websocket-settings")
+            proxy_cmd.append(self._websocket_settings.to_json())
+
+        self._log.info(f"Running proxy server via command: {' '.join(proxy_cmd)}")
+        return spawn(proxy_cmd, os.environ.copy(), log_lines(self._log), cwd=self._cwd)
+
+    def _register_with_daemon(self):
+        from dbtunnel.vendor.asgiproxy.control import ProxyDaemonClient
+        client = ProxyDaemonClient().ensure_running()
+        client.register(framework=self._framework,
+                        url_base_path=self._url_base_path,
+                        proxy_port=self._proxy_port,
+                        service_port=self._service_port,
+                        service_ports=self._service_ports,
+                        token_auth=self._token_auth,
+                        token_auth_workspace_url=self._token_auth_workspace_url,
+                        websocket_settings=json.loads(self._websocket_settings.to_json())
+                        if self._websocket_settings is not None else None)
+        return client
 
     def start(self):
-        self._thread.start()
+        if self._mode == "daemon":
+            from dbtunnel.vendor.asgiproxy.control import ProxyDaemonError
+            try:
+                self._daemon_client = self._register_with_daemon()
+                self._log.info(f"Registered route {self._url_base_path} with the proxy daemon on port: "
+                               f"{self._proxy_port}")
+                return self
+            except (OSError, ProxyDaemonError) as e:
+                self._log.info(f"Unable to use the proxy daemon ({e}); falling back to a proxy subprocess")
+        if self._mode == "embedded":
+            try:
+                self._embedded_server = self._make_embedded_server().start()
+                self._log.info(f"Started embedded proxy server on port: {self._proxy_port}")
+                return self
+            except ImportError as e:
+                self._log.info(f"Unable to run the proxy in process ({e}); falling back to a proxy subprocess")
+        self._process = self._spawn_subprocess()
+        return self
+
+    def set_upstream_available(self, available: bool):
+        """
+        Open or close the proxy's readiness gate. Only the embedded proxy can be told, the subprocess and daemon
+        proxies notice the app is down on their own and keep retrying it.
+        """
+        if self._embedded_server is not None:
+            self._embedded_server.proxy_context.mark_upstream_available(available)
+
+    def wait_until_ready(self, timeout: float = 30.0) -> bool:
+        if self._embedded_server is not None:
+            return self._embedded_server.wait_until_started(timeout) is not None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if is_port_open("127.0.0.1", self._proxy_port):
+                return True
+            time.sleep(0.25)
+        return False
+
+    def stop(self, timeout: float = 30.0):
+        """
+        Drain the proxy and stop it: in flight requests get up to timeout seconds, websockets are closed with 1001.
+        """
+        if self._daemon_client is not None:
+            # the daemon drains the route in the background and keeps serving the other apps
+            self._daemon_client.deregister(self._url_base_path, drain_timeout=timeout)
+            self._daemon_client = None
+        if self._embedded_server is not None:
+            self._embedded_server.proxy_context.drain_timeout = timeout
+            self._embedded_server.stop()
+            self._embedded_server.join(timeout + 5)
+        if self._process is not None and self._process.poll() is None:
+            # the proxy drains on SIGTERM
+            self._process.terminate()
+            if self._process.wait(timeout + 5) is None:
+                self._process.kill()
         return self
 
     def wait(self):
-        self._thread.join()
+        if self._daemon_client is not None:
+            # the app is gone, free the port on the daemon but leave the daemon running for the other apps
+            self._daemon_client.deregister(self._url_base_path)
+            self._daemon_client = None
+        if self._embedded_server is not None:
+            self._embedded_server.join()
+        if self._process is not None and self._process.wait():
+            self._log.info(f"Proxy server exited with code {self._process.returncode}")
         return self
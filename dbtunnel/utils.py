@@ -1,44 +1,139 @@
+import asyncio
 import atexit
 import datetime
+import json
 import logging
+import logging.handlers
 import os
 import queue
-import shutil
 import subprocess
 import sys
-import tempfile
+import threading
+import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 from fnmatch import fnmatch
 from functools import cached_property
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from typing import List, Any, Optional, Literal
+from typing import List, Any, Optional, Literal, Callable, Dict
 
-try:
-    from databricks.sdk import WorkspaceClient
-except ImportError:
-    print("databricks-sdk not installed. Please install databricks-sdk to use this feature")
-    raise
 
+# never staged, they are large, churn constantly or are not needed to run the app
+STAGING_SKIP_DIRS = {".git", "__pycache__", "node_modules", ".ipynb_checkpoints", ".venv", "venv"}
 
-@contextmanager
-def process_file(input_path):
-    temp_dir = tempfile.mkdtemp()
-    try:
-        # Create a temporary directory
 
-        # Build the destination path in the temporary directory
-        temp_file_path = os.path.join(temp_dir, os.path.basename(input_path))
+class StagingCache:
+    """
+    Local copy of an app directory so apps run from the driver disk instead of WSFS and can import their sibling
+    modules. The copy lives under ~/.dbtunnel/staging/<hash of the source directory> and is reused between runs:
+    files whose size and mtime did not change are not read again, changed files are hashed and only copied when
+    their content differs from the manifest, and files removed from the source are removed from the copy.
+
+    Directories over max_files or max_bytes (e.g. a script directly in a home folder) fall back to copying just the
+    script.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_files: int = 2000, max_bytes: int = 100 * 1024 * 1024):
+        self._root = root or Path(os.path.expanduser("~")) / ".dbtunnel" / "staging"
+        self._max_files = max_files
+        self._max_bytes = max_bytes
+
+    def _walk(self, source_dir: Path) -> Optional[Dict[str, os.stat_result]]:
+        files = {}
+        total_bytes = 0
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            dirnames[:] = [d for d in dirnames if d not in STAGING_SKIP_DIRS]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files[str(path.relative_to(source_dir))] = stat
+                total_bytes += stat.st_size
+                if len(files) > self._max_files or total_bytes > self._max_bytes:
+                    return None
+        return files
+
+    @contextmanager
+    def _locked(self, staging_dir: Path):
+        import fcntl
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        with open(staging_dir / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stage(self, input_path: str) -> str:
+        """
+        Sync the directory of input_path into the cache and return the path of the staged script.
+        """
+        import hashlib
+        source_file = Path(input_path).resolve()
+        source_dir = source_file.parent
+        staging_dir = self._root / hashlib.sha256(str(source_dir).encode("utf-8")).hexdigest()[:16]
+        app_dir = staging_dir / "app"
+        manifest_path = staging_dir / "manifest.json"
+        with self._locked(staging_dir):
+            files = self._walk(source_dir)
+            if files is None:
+                logging.info(f"{source_dir} is too large to stage, staging only {source_file.name}")
+                files = {source_file.name: source_file.stat()}
+            try:
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except (FileNotFoundError, ValueError):
+                manifest = {}
+
+            copied = 0
+            new_manifest = {}
+            for rel_path, stat in files.items():
+                entry = manifest.get(rel_path)
+                staged = app_dir / rel_path
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns \
+                        and staged.exists():
+                    new_manifest[rel_path] = entry
+                    continue
+                try:
+                    content = (source_dir / rel_path).read_bytes()
+                except OSError:
+                    continue
+                digest = hashlib.sha256(content).hexdigest()
+                if entry is None or entry["sha256"] != digest or not staged.exists():
+                    staged.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = staged.with_name(staged.name + ".dbtunnel-tmp")
+                    tmp_path.write_bytes(content)
+                    os.replace(tmp_path, staged)
+                    copied += 1
+                new_manifest[rel_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
 
-        # Copy the file to the temporary directory
-        shutil.copy(input_path, temp_file_path)
+            removed = 0
+            for rel_path in set(manifest) - set(new_manifest):
+                try:
+                    (app_dir / rel_path).unlink()
+                    removed += 1
+                except OSError:
+                    pass
 
-        # Yield the temporary file path to the caller
-        yield temp_file_path
-    finally:
-        # Cleanup: Remove the temporary directory and its contents
-        shutil.rmtree(temp_dir, ignore_errors=True)
+            tmp_manifest = manifest_path.with_suffix(".tmp")
+            with open(tmp_manifest, "w") as f:
+                json.dump(new_manifest, f)
+            os.replace(tmp_manifest, manifest_path)
+        logging.info(f"Staged {source_dir} in {app_dir}: {copied} copied, {removed} removed, "
+                     f"{len(new_manifest) - copied} unchanged")
+        return str(app_dir / source_file.name)
+
+
+@contextmanager
+def process_file(input_path):
+    """
+    Yields the path of a local staged copy of the script, its directory is staged with it so sibling imports work.
+    The staged copy is kept for the next run.
+    """
+    yield StagingCache().stage(input_path)
 
 
 def ensure_python_path(env):
@@ -54,6 +149,7 @@ def ensure_python_path(env):
 def execute(cmd: List[str], env, cwd=None, ensure_python_site_packages=True, shell=False, trim_new_line=True):
     if ensure_python_site_packages:
         ensure_python_path(env)
+    mark_managed(env)
     import subprocess
     if shell is True:
         cmd = " ".join(cmd)
@@ -82,6 +178,362 @@ def execute(cmd: List[str], env, cwd=None, ensure_python_site_packages=True, she
         raise subprocess.CalledProcessError(return_code, cmd)
 
 
+class ManagedProcess:
+    """
+    Handle to a child started by LogMultiplexer.spawn. Mirrors the parts of Popen and Thread the tunnels use.
+    """
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        # set when a line callback raised, the process is killed in that case
+        self.error: Optional[BaseException] = None
+        self._process = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._done = threading.Event()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode if self._done.is_set() else None
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        self._done.wait(timeout)
+        return self.returncode
+
+    def join(self, timeout: Optional[float] = None):
+        self.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return not self._done.is_set()
+
+    def _send(self, method: str):
+        def send():
+            try:
+                getattr(self._process, method)()
+            except ProcessLookupError:
+                pass
+
+        if self._process is not None and not self._done.is_set():
+            self._loop.call_soon_threadsafe(send)
+
+    def kill(self):
+        self._send("kill")
+
+    def terminate(self):
+        self._send("terminate")
+
+
+class LogMultiplexer:
+    """
+    Reads the output of every child process we spawn on one asyncio loop thread instead of one blocking readline
+    thread per process. Output is read in large chunks, split into lines in bulk and handed to the callback in
+    batches, so a chatty app costs one callback per batch rather than one log call per line.
+    """
+    _instance: Optional["LogMultiplexer"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, batch_lines: int = 256, batch_interval: float = 0.05, read_size: int = 64 * 1024):
+        self._batch_lines = batch_lines
+        self._batch_interval = batch_interval
+        self._read_size = read_size
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="dbtunnel-log-mux", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> "LogMultiplexer":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def spawn(self,
+              cmd: List[str],
+              env,
+              on_lines: Callable[[List[str]], None],
+              cwd=None,
+              shell=False,
+              ensure_python_site_packages=True) -> ManagedProcess:
+        """
+        Start cmd with stdout and stderr going to on_lines, which is called on the multiplexer thread. Spawn errors
+        (e.g. the executable does not exist) are raised here.
+        """
+        if ensure_python_site_packages:
+            ensure_python_path(env)
+        mark_managed(env)
+        managed = ManagedProcess(cmd)
+        asyncio.run_coroutine_threadsafe(self._start(managed, cmd, env, on_lines, cwd, shell), self._loop).result()
+        return managed
+
+    async def _start(self, managed: ManagedProcess, cmd, env, on_lines, cwd, shell):
+        if shell is True:
+            process = await asyncio.create_subprocess_shell(" ".join(cmd), stdout=asyncio.subprocess.PIPE,
+                                                            stderr=asyncio.subprocess.STDOUT, env=env, cwd=cwd)
+        else:
+            process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.STDOUT, env=env, cwd=cwd)
+        managed._process = process
+        managed._loop = self._loop
+        managed.pid = process.pid
+        self._loop.create_task(self._pump(managed, process, on_lines))
+
+    def _emit(self, managed: ManagedProcess, on_lines, lines: List[str]):
+        if not lines or managed.error is not None:
+            return
+        try:
+            on_lines(lines)
+        except BaseException as e:
+            logging.error(f"Stopping {managed.cmd[0]} (pid {managed.pid}): {e}")
+            managed.error = e
+            managed.kill()
+
+    async def _pump(self, managed: ManagedProcess, process, on_lines):
+        buffer = b""
+        pending: List[str] = []
+        try:
+            while True:
+                try:
+                    # only wait up to the batch interval while lines are pending so they are not held back
+                    chunk = await asyncio.wait_for(process.stdout.read(self._read_size),
+                                                   self._batch_interval if pending else None)
+                except asyncio.TimeoutError:
+                    self._emit(managed, on_lines, pending)
+                    pending = []
+                    continue
+                if not chunk:
+                    break
+                *complete, buffer = (buffer + chunk).split(b"\n")
+                pending.extend(line.decode("utf-8", errors="replace").rstrip("\r") for line in complete)
+                if len(pending) >= self._batch_lines:
+                    self._emit(managed, on_lines, pending)
+                    pending = []
+            if buffer:
+                pending.append(buffer.decode("utf-8", errors="replace").rstrip("\r"))
+            self._emit(managed, on_lines, pending)
+        finally:
+            managed.returncode = await process.wait()
+            managed._done.set()
+
+
+def spawn(cmd: List[str], env, on_lines: Callable[[List[str]], None], cwd=None, shell=False,
+          ensure_python_site_packages=True) -> ManagedProcess:
+    return LogMultiplexer.get().spawn(cmd, env, on_lines, cwd=cwd, shell=shell,
+                                      ensure_python_site_packages=ensure_python_site_packages)
+
+
+def log_lines(logger: logging.Logger, level: int = logging.INFO) -> Callable[[List[str]], None]:
+    """
+    Line callback for spawn that writes each batch as a single log record.
+    """
+
+    def on_lines(lines: List[str]):
+        logger.log(level, "\n".join(lines))
+
+    return on_lines
+
+
+# set on every child dbtunnel starts, to the pid of the python process that started it
+DBTUNNEL_MANAGED_ENV = "DBTUNNEL_MANAGED"
+
+
+def mark_managed(env):
+    env[DBTUNNEL_MANAGED_ENV] = str(os.getpid())
+    return env
+
+
+@dataclass
+class PortOwner:
+    pid: int
+    cmdline: str
+    # pid of the dbtunnel process that started it, None if dbtunnel did not start it
+    managed_by: Optional[int]
+
+    @property
+    def managed(self) -> bool:
+        return self.managed_by is not None
+
+
+def _listening_socket_inodes(port: int) -> set:
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table, "r") as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            # local_address is hex ip:port, st 0A is LISTEN
+            if len(fields) > 9 and fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                inodes.add(fields[9])
+    return inodes
+
+
+def _read_proc_file(pid: int, name: str) -> Optional[bytes]:
+    try:
+        with open(f"/proc/{pid}/{name}", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _managed_by(pid: int) -> Optional[int]:
+    environ = _read_proc_file(pid, "environ") or b""
+    prefix = f"{DBTUNNEL_MANAGED_ENV}=".encode("utf-8")
+    for item in environ.split(b"\0"):
+        if item.startswith(prefix):
+            try:
+                return int(item[len(prefix):])
+            except ValueError:
+                return None
+    return None
+
+
+def get_port_owners(port: int) -> List[PortOwner]:
+    """
+    Processes listening on port, found by matching the socket inodes in /proc/net/tcp{,6} against /proc/*/fd.
+    Processes of other users whose fds we can not read are not returned.
+    """
+    inodes = _listening_socket_inodes(port)
+    if not inodes:
+        return []
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    owners = []
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        pid = int(entry.name)
+        try:
+            fds = os.listdir(f"/proc/{pid}/fd")
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(f"/proc/{pid}/fd/{fd}") in targets:
+                    cmdline = (_read_proc_file(pid, "cmdline") or b"").replace(b"\0", b" ").decode("utf-8",
+                                                                                                   "replace")
+                    owners.append(PortOwner(pid=pid, cmdline=cmdline.strip(), managed_by=_managed_by(pid)))
+                    break
+            except OSError:
+                continue
+    return owners
+
+
+def kill_port(port: int, only_own: bool = True, timeout: float = 5.0) -> List[PortOwner]:
+    """
+    Terminate the dbtunnel started processes listening on port, everything else on the port is left alone.
+
+    :param only_own: only processes started from this python process, e.g. the previous run of the same cell, or
+        left behind by one that no longer runs, e.g. the kernel before a notebook restart
+    :param timeout: seconds to wait after SIGTERM before sending SIGKILL
+    :return: the processes that were signalled
+    """
+    import signal
+    current_pid = os.getpid()
+    targets = []
+    for owner in get_port_owners(port):
+        if owner.pid == current_pid or not owner.managed or \
+                (only_own and owner.managed_by != current_pid and _is_running(owner.managed_by)):
+            logging.info(f"Not killing pid {owner.pid} on port {port}, it was not started by "
+                         f"{'this notebook' if only_own else 'dbtunnel'}: {owner.cmdline}")
+            continue
+        try:
+            os.kill(owner.pid, signal.SIGTERM)
+            targets.append(owner)
+        except ProcessLookupError:
+            continue
+    deadline = time.monotonic() + timeout
+    for owner in targets:
+        while time.monotonic() < deadline and _is_running(owner.pid):
+            time.sleep(0.05)
+        if _is_running(owner.pid):
+            try:
+                os.kill(owner.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    return targets
+
+
+def _is_running(pid: int) -> bool:
+    stat = _read_proc_file(pid, "stat")
+    # our own children stay around as zombies until whoever spawned them reaps them
+    return stat is not None and stat.rsplit(b")", 1)[-1].split()[0] != b"Z"
+
+
+@dataclass
+class ProcessStats:
+    """
+    Resource usage of a process and all of its descendants, summed.
+    """
+    pids: List[int]
+    rss_bytes: int = 0
+    cpu_seconds: float = 0.0
+    open_fds: int = 0
+    threads: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pids": self.pids,
+                "rss_bytes": self.rss_bytes,
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "open_fds": self.open_fds,
+                "threads": self.threads}
+
+
+def _parse_proc_stat(stat: bytes) -> Optional[tuple]:
+    # the command name is in parens and may contain spaces, the fields after it are fixed
+    fields = stat.rsplit(b")", 1)[-1].split()
+    if len(fields) < 22 or fields[0] == b"Z":
+        return None
+    # ppid, utime + stime in clock ticks, num_threads, rss in pages
+    return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21])
+
+
+def get_process_children() -> Dict[int, List[int]]:
+    """
+    Parent pid -> child pids for every live process, from one pass over /proc.
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        stat = _read_proc_file(int(entry.name), "stat")
+        parsed = _parse_proc_stat(stat) if stat is not None else None
+        if parsed is not None:
+            children.setdefault(parsed[0], []).append(int(entry.name))
+    return children
+
+
+def get_process_tree_stats(pid: int, children: Optional[Dict[int, List[int]]] = None) -> Optional[ProcessStats]:
+    """
+    Sample RSS, cpu time, open fds and threads of pid and its descendants from /proc, None if pid is gone. Pass
+    children from get_process_children to sample several trees off one scan of /proc.
+    """
+    children = children if children is not None else get_process_children()
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    stats: Optional[ProcessStats] = None
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        stat = _read_proc_file(current, "stat")
+        parsed = _parse_proc_stat(stat) if stat is not None else None
+        if parsed is None:
+            continue
+        _, cpu_ticks, threads, rss_pages = parsed
+        if stats is None:
+            stats = ProcessStats(pids=[])
+        stats.pids.append(current)
+        stats.cpu_seconds += cpu_ticks / clock_ticks
+        stats.threads += threads
+        stats.rss_bytes += rss_pages * page_size
+        try:
+            stats.open_fds += len(os.listdir(f"/proc/{current}/fd"))
+        except OSError:
+            pass
+        pending.extend(children.get(current, []))
+    return stats
+
+
 def pkill(process_name):
     try:
         subprocess.run(["pkill", process_name])
@@ -138,6 +590,7 @@ class DatabricksContext:
 
     @cached_property
     def current_user_name(self) -> str:
+        from databricks.sdk import WorkspaceClient
         return WorkspaceClient(host=self.host,
                                token=self.token).current_user.me().user_name
 
@@ -159,7 +612,11 @@ class ComputeUtils:
 
     def __init__(self, dbx_ctx: DatabricksContext):
         self._ctx = dbx_ctx
-        self._client = WorkspaceClient(host=self._ctx.host, token=self._ctx.token)
+
+    @cached_property
+    def _client(self):
+        from databricks.sdk import WorkspaceClient
+        return WorkspaceClient(host=self._ctx.host, token=self._ctx.token)
 
     def get_warehouse(self, name_glob: str, ignore_case: bool = True, serverless_only: bool = True):
         for warehouse in self._client.warehouses.list():
@@ -182,19 +639,123 @@ class ComputeUtils:
                                     warehouse.enable_serverless_compute)
 
 
+class LogArchiver:
+    """
+    Copies rotated log files to the archive folder on a small pool of background threads so a slow FUSE mount
+    (e.g. Volumes) never stalls the logging thread. Files are compressed while they are copied, written with large
+    sequential writes to a temp name and renamed into place once complete. Failed copies are retried with
+    exponential backoff.
+    """
+    _instance: Optional["LogArchiver"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, max_retries: int = 5,
+                 backoff_initial: float = 1.0, chunk_size: int = 8 * 1024 * 1024):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._max_retries = max_retries
+        self._backoff_initial = backoff_initial
+        self._chunk_size = chunk_size
+        self._workers = [threading.Thread(target=self._work, name=f"dbtunnel-log-archiver-{i}", daemon=True)
+                         for i in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def get(cls) -> "LogArchiver":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def submit(self, staged_file: Path, archive_path: Path, compression: str) -> bool:
+        try:
+            self._queue.put_nowait((staged_file, archive_path, compression))
+            return True
+        except queue.Full:
+            # left in the staging folder, picked up again the next time a handler for this log is created
+            print(f"Log archive queue is full, {staged_file.name} will be archived later")
+            return False
+
+    def _work(self):
+        while True:
+            staged_file, archive_path, compression = self._queue.get()
+            try:
+                self._archive_with_retries(staged_file, archive_path, compression)
+            finally:
+                self._queue.task_done()
+
+    def _archive_with_retries(self, staged_file: Path, archive_path: Path, compression: str):
+        backoff = self._backoff_initial
+        for attempt in range(self._max_retries + 1):
+            try:
+                self.archive(staged_file, archive_path, compression)
+                staged_file.unlink()
+                return
+            except FileNotFoundError:
+                return
+            except Exception as e:
+                if attempt == self._max_retries:
+                    print(f"Unable to archive log file {staged_file.name} after {attempt + 1} attempts: {e}")
+                    return
+                time.sleep(backoff)
+                backoff *= 2
+
+    def _compressor(self, compression: str, target):
+        if compression == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor().stream_writer(target, closefd=False)
+        if compression == "gzip":
+            import gzip
+            return gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6)
+        return None
+
+    def archive(self, staged_file: Path, archive_path: Path, compression: str):
+        suffix = {"zstd": ".zst", "gzip": ".gz"}.get(compression, "")
+        final_path = archive_path / (staged_file.name + suffix)
+        tmp_path = archive_path / (final_path.name + ".tmp")
+        with open(staged_file, "rb") as src, open(tmp_path, "wb", buffering=self._chunk_size) as dst:
+            compressor = self._compressor(compression, dst)
+            out = compressor or dst
+            while True:
+                chunk = src.read(self._chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+            if compressor is not None:
+                compressor.close()
+        os.replace(tmp_path, final_path)
+
+
+def _default_archive_compression() -> str:
+    try:
+        import zstandard  # noqa: F401
+        return "zstd"
+    except ImportError:
+        return "gzip"
+
+
 class ArchivingTimedRotatingFileHandler(TimedRotatingFileHandler):
     """
     Rotate the files in the cluster native FS and during the rotate time period copy the file to
-    a volume so there are no issues with file system shenanigans with FUSE implementation
+    a volume so there are no issues with file system shenanigans with FUSE implementation.
+
+    The copy happens on the LogArchiver threads, rotating only hard links the rotated file into a staging folder.
     """
 
     def __init__(self, archive_path: Path, filename, when='h', interval=1, backupCount=0,
                  encoding=None, delay=False, utc=False, atTime=None,
-                 errors=None):
+                 errors=None, compression: Optional[Literal["gzip", "zstd", "none"]] = None):
         super().__init__(filename, when, interval, backupCount, encoding, delay, utc, atTime, errors)
         self._archive_path = archive_path
         if not self._archive_path.exists():
             self._archive_path.mkdir(parents=True)
+        self._compression = compression or _default_archive_compression()
+        # outside the log folder's own naming scheme so backupCount cleanup never deletes a file being archived
+        self._staging_path = Path(self.baseFilename).parent / ".archiving"
+        self._staging_path.mkdir(parents=True, exist_ok=True)
+        for staged_file in sorted(self._staging_path.iterdir()):
+            if staged_file.name.startswith(Path(self.baseFilename).name):
+                LogArchiver.get().submit(staged_file, self._archive_path, self._compression)
 
     def rotate(self, source, dest):
         super().rotate(source, dest)
@@ -203,9 +764,119 @@ class ArchivingTimedRotatingFileHandler(TimedRotatingFileHandler):
 
     def archive_log_file(self, log_file):
         try:
-            shutil.copy(log_file, str(self._archive_path))
+            staged_file = self._staging_path / Path(log_file).name
+            os.link(log_file, staged_file)
+        except FileExistsError:
+            staged_file = self._staging_path / Path(log_file).name
         except Exception as e:
             print(f"Unable to archive log file: {e}")
+            return
+        LogArchiver.get().submit(staged_file, self._archive_path, self._compression)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the logging thread. When the queue is full records are dropped according to the
+    overflow policy instead of waiting for the listener:
+
+    - drop-oldest: evict the oldest queued record to make room for the new one
+    - sample: keep one in every `sample_every` overflowing records (evicting the oldest for it), drop the rest
+
+    Records at ERROR and above always evict the oldest record rather than being dropped. The number of dropped
+    records is reported with the next record that makes it into the queue.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow_policy: Literal["drop-oldest", "sample"] = "drop-oldest",
+                 sample_every: int = 10):
+        super().__init__(log_queue)
+        if overflow_policy not in ["drop-oldest", "sample"]:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.overflow_policy = overflow_policy
+        self.sample_every = max(sample_every, 1)
+        self.dropped = 0
+        self._unreported = 0
+        self._overflowed = 0
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def _evict_and_put(self, record: logging.LogRecord):
+        try:
+            self.queue.get_nowait()
+            self._count_drop()
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._count_drop()
+
+    def _count_drop(self):
+        self.dropped += 1
+        self._unreported += 1
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._lock:
+            now = time.monotonic()
+            # at most one notice a second while the queue stays full
+            if self._unreported and (self.queue.qsize() < self.queue.maxsize or now - self._last_report >= 1.0):
+                notice = logging.makeLogRecord({"name": record.name, "levelno": logging.WARNING,
+                                                "levelname": "WARNING", "module": "utils",
+                                                "funcName": type(self).__name__,
+                                                "msg": "Dropped %d log records, the log queue was full (policy: %s)",
+                                                "args": (self._unreported, self.overflow_policy)})
+                self._unreported = 0
+                self._last_report = now
+                self._evict_and_put(notice)
+            self._put(record)
+
+    def _put(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.ERROR or self.overflow_policy == "drop-oldest":
+            self._evict_and_put(record)
+            return
+        self._overflowed += 1
+        if self._overflowed % self.sample_every == 0:
+            self._evict_and_put(record)
+        else:
+            self._count_drop()
+
+
+@dataclass
+class _LoggingPipeline:
+    config: tuple
+    queue_handler: DroppingQueueHandler
+    listener: logging.handlers.QueueListener
+    handlers: List[logging.Handler]
+
+    def stop(self):
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+# one queue, listener thread and set of handlers per app name for the whole process
+_logging_pipelines: Dict[str, _LoggingPipeline] = {}
+_logging_pipelines_lock = threading.Lock()
+
+
+@atexit.register
+def _stop_logging_pipelines():
+    with _logging_pipelines_lock:
+        for pipeline in _logging_pipelines.values():
+            pipeline.stop()
+        _logging_pipelines.clear()
+
+
+def get_dropped_log_records() -> Dict[str, int]:
+    """
+    Records dropped so far by each app name's logging queue.
+    """
+    with _logging_pipelines_lock:
+        return {app_name: pipeline.queue_handler.dropped for app_name, pipeline in _logging_pipelines.items()}
 
 
 def get_logger(
@@ -218,18 +889,61 @@ def get_logger(
         backup_count: int = 3,
         at_time: Optional[datetime.time] = None,
         format_str: str = "[%(asctime)s] [%(levelname)s] {%(module)s.py:%(funcName)s:%(lineno)d} - %(message)s",
-        datefmt_str: str = "%Y-%m-%dT%H:%M:%S%z"
+        datefmt_str: str = "%Y-%m-%dT%H:%M:%S%z",
+        queue_size: int = 1000,
+        overflow_policy: Literal["drop-oldest", "sample"] = "drop-oldest",
+        sample_every: int = 10,
+        archive_compression: Optional[Literal["gzip", "zstd", "none"]] = None,
 ):
     # driver instead of workspace path to not deal with WSFS
     home_dir = os.path.expanduser('~')
     cluster_logging_file_path = cluster_logging_file_path or Path(f"{home_dir}/logs/{app_name}/{app_name}.log")
-    if not cluster_logging_file_path.parent.exists():
-        cluster_logging_file_path.parent.mkdir(parents=True)
 
     logger = logging.getLogger(app_name)
+    config = (str(cluster_logging_file_path), str(logging_archive_folder), rotate_when, rotate_interval,
+              backup_count, at_time, format_str, datefmt_str, queue_size, archive_compression)
+
+    with _logging_pipelines_lock:
+        pipeline = _logging_pipelines.get(app_name)
+        if pipeline is not None and pipeline.config != config:
+            # reinitialized with different settings, replace the old listener and close its files
+            pipeline.stop()
+            pipeline = None
+        if pipeline is None:
+            pipeline = _make_logging_pipeline(config, cluster_logging_file_path, logging_archive_folder,
+                                              overflow_policy, sample_every)
+            _logging_pipelines[app_name] = pipeline
+        pipeline.queue_handler.overflow_policy = overflow_policy
+        pipeline.queue_handler.sample_every = max(sample_every, 1)
+
+        # incase this is reinitialized remove all handlers
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+        # Add the QueueListener handler to the root logger
+        logger.addHandler(pipeline.queue_handler)
+
+    # Set the log level for the root logger
+    logger.setLevel(logging.DEBUG)
+
+    # disable py4j logger
+    logging.getLogger("py4j").setLevel(logging.ERROR)
+
+    return logger
+
+
+def _make_logging_pipeline(config: tuple,
+                           cluster_logging_file_path: Path,
+                           logging_archive_folder: Optional[Path],
+                           overflow_policy: Literal["drop-oldest", "sample"],
+                           sample_every: int) -> _LoggingPipeline:
+    (_, _, rotate_when, rotate_interval, backup_count, at_time, format_str, datefmt_str, queue_size,
+     archive_compression) = config
+    if not cluster_logging_file_path.parent.exists():
+        cluster_logging_file_path.parent.mkdir(parents=True)
 
     # Create a queue
-    log_queue = queue.Queue(maxsize=100)
+    log_queue = queue.Queue(maxsize=queue_size)
 
     # Create a formatter for 'simple' and 'detailed' formats
     detailed_formatter = logging.Formatter(
@@ -253,6 +967,7 @@ def get_logger(
         file_handler = ArchivingTimedRotatingFileHandler(
             archive_path=logging_archive_folder,
             filename=cluster_logging_file_path,
+            compression=archive_compression,
             **time_rotate_cfg
         )
     else:
@@ -263,39 +978,53 @@ def get_logger(
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(detailed_formatter)
 
-    # Create a QueueListener with the created queue and the added handlers
-    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler = DroppingQueueHandler(log_queue, overflow_policy=overflow_policy, sample_every=sample_every)
 
+    # Create a QueueListener with the created queue and the added handlers
     queue_listener = logging.handlers.QueueListener(
         log_queue, stdout_handler, file_handler, respect_handler_level=True
     )
 
-    # incase this is reinitialized remove all handlers
-    for handler in logger.handlers:
-        logger.removeHandler(handler)
+    # Start the QueueListener
+    queue_listener.start()
+
+    return _LoggingPipeline(config=config,
+                            queue_handler=queue_handler,
+                            listener=queue_listener,
+                            handlers=[stdout_handler, file_handler])
 
-    # Add the QueueListener handler to the root logger
-    logger.addHandler(queue_handler)
 
-    # Set the log level for the root logger
-    logger.setLevel(logging.DEBUG)
+_UNSET = object()
+_ctx = _UNSET
+_compute_utils = _UNSET
 
-    # disable py4j logger
-    logging.getLogger("py4j").setLevel(logging.ERROR)
 
-    # Start the QueueListener
-    queue_listener.start()
+def get_ctx() -> Optional[DatabricksContext]:
+    """
+    Databricks context, created on first use rather than at import so `import dbtunnel` stays cheap and the proxy
+    process never pays for it. None when running outside of databricks.
+    """
+    global _ctx
+    if _ctx is _UNSET:
+        try:
+            _ctx = DatabricksContext()
+        except Exception:
+            logging.info("Unable to establish context, you are most likely running outside of databricks")
+            _ctx = None
+    return _ctx
 
-    # Register a function to stop the QueueListener on program exit
-    atexit.register(queue_listener.stop)
 
-    return logger
+def get_compute_utils() -> Optional[ComputeUtils]:
+    global _compute_utils
+    if _compute_utils is _UNSET:
+        _compute_utils = ComputeUtils(get_ctx()) if get_ctx() is not None else None
+    return _compute_utils
 
 
-try:
-    ctx = DatabricksContext()
-    compute_utils = ComputeUtils(ctx)
-except Exception as e:
-    logging.info("Unable to establish context, you are most likely running outside of databricks")
-    ctx = None
-    compute_utils = None
+def __getattr__(name: str):
+    # keeps `from dbtunnel.utils import ctx, compute_utils` working while deferring the work to first access
+    if name == "ctx":
+        return get_ctx()
+    if name == "compute_utils":
+        return get_compute_utils()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -19,25 +19,8 @@ class UvicornAppTunnel(DbTunnel):
     def _run(self):
         self.display()
         self._log.info("Starting server...")
-        import nest_asyncio
-        import uvicorn
-        nest_asyncio.apply()
-
-        # Start the server
-        async def start():
-            config = uvicorn.Config(
-                self._asgi_app,
-                host="0.0.0.0",
-                port=self._port,
-                root_path=self._proxy_settings.url_base_path.rstrip("/")
-            )
-            server = uvicorn.Server(config)
-            await server.serve()
-
-        # Run the asyncio event loop instead of uvloop to enable re entrance
-        import asyncio
         self._log.info(f"Use this link to access your uvicorn based app: \n{self._proxy_settings.proxy_url}")
-        asyncio.run(start())
+        self._serve_uvicorn(self._asgi_app, root_path=self._proxy_settings.url_base_path.rstrip("/"))
 
     def _display_url(self):
         # must end with a "/" for it to not redirect
@@ -0,0 +1,234 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, List, Callable
+
+from dbtunnel.errors import DBTunnelError
+from dbtunnel.utils import spawn, mark_managed, ManagedProcess
+
+
+# printed by a warm interpreter once its modules are imported, followed by json with the import time
+WARM_READY_MARKER = "DBTUNNEL_WARM_READY "
+_WARM_BOOTSTRAP = "import sys; from dbtunnel.warm_pool import _warm_interpreter_main; _warm_interpreter_main(sys.argv[1:])"
+
+
+def _warm_interpreter_main(argv: List[str]):
+    """
+    Entry point of a warm interpreter: import the heavy modules, report ready, then block on the launch fifo and
+    become the app described by the launch spec written to it.
+    """
+    import importlib
+    import runpy
+    import sys
+    fifo_path, modules = argv[0], [module for module in argv[1].split(",") if module]
+    started_at = time.monotonic()
+    failed = []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            failed.append(f"{module}: {type(e).__name__}: {e}")
+    print(WARM_READY_MARKER + json.dumps({"import_seconds": time.monotonic() - started_at, "failed": failed}),
+          flush=True)
+    with open(fifo_path, "r") as f:
+        spec = json.loads(f.read())
+    os.environ.clear()
+    os.environ.update(spec["env"])
+    if spec.get("cwd"):
+        os.chdir(spec["cwd"])
+    sys.argv = list(spec["argv"])
+    if spec["kind"] == "console_script":
+        from importlib.metadata import entry_points
+        (entry_point,) = entry_points(group="console_scripts", name=spec["name"])
+        sys.exit(entry_point.load()())
+    if spec["kind"] == "module":
+        runpy.run_module(spec["module"], run_name="__main__", alter_sys=True)
+        return
+    sys.path.insert(0, os.path.dirname(os.path.abspath(spec["path"])))
+    runpy.run_path(spec["path"], run_name="__main__")
+
+
+def _warm_launch_spec(cmd: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    How a warm interpreter runs cmd, None if it can not, e.g. for non python executables or a python other than
+    the one the warm interpreters run, whose packages would differ.
+    """
+    import shutil
+    import sys
+    executable = os.path.basename(cmd[0])
+    resolved = shutil.which(cmd[0])
+    if cmd[0] == sys.executable or executable.startswith("python"):
+        if os.path.realpath(resolved or cmd[0]) != os.path.realpath(sys.executable):
+            return None
+        if len(cmd) >= 3 and cmd[1] == "-m":
+            return {"kind": "module", "module": cmd[2], "argv": [cmd[2], *cmd[3:]]}
+        if len(cmd) >= 2 and not cmd[1].startswith("-"):
+            return {"kind": "path", "path": cmd[1], "argv": cmd[1:]}
+        return None
+    # console scripts of this environment live next to its interpreter, one found elsewhere on PATH belongs to
+    # another environment even if this one has an entry point of the same name
+    if resolved is None or \
+            os.path.realpath(os.path.dirname(resolved)) != os.path.realpath(os.path.dirname(sys.executable)):
+        return None
+    from importlib.metadata import entry_points
+    if not entry_points(group="console_scripts", name=executable):
+        return None
+    return {"kind": "console_script", "name": executable, "argv": cmd}
+
+
+class WarmInterpreter:
+    """
+    A python process with the pool's modules already imported, waiting for a launch spec on its fifo. Output
+    printed before the handoff is kept and passed on to the app's line callback.
+    """
+
+    def __init__(self, modules: List[str], max_buffered_lines: int = 1000):
+        import sys
+        import tempfile
+        self._dir = tempfile.mkdtemp(prefix="dbtunnel-warm-")
+        self._fifo_path = os.path.join(self._dir, "launch")
+        os.mkfifo(self._fifo_path, 0o600)
+        self._lock = threading.Lock()
+        self._buffered: List[str] = []
+        self._max_buffered_lines = max_buffered_lines
+        self._on_lines: Optional[Callable[[List[str]], None]] = None
+        self._ready = threading.Event()
+        self.import_seconds: Optional[float] = None
+        self.failed_imports: List[str] = []
+        self.process = spawn([sys.executable, "-c", _WARM_BOOTSTRAP, self._fifo_path, ",".join(modules)],
+                             os.environ.copy(), self._dispatch)
+
+    def _dispatch(self, lines: List[str]):
+        with self._lock:
+            on_lines = self._on_lines
+            if on_lines is None:
+                for line in lines:
+                    if not self._ready.is_set() and line.startswith(WARM_READY_MARKER):
+                        report = json.loads(line[len(WARM_READY_MARKER):])
+                        self.import_seconds = report["import_seconds"]
+                        self.failed_imports = report["failed"]
+                        self._ready.set()
+                    elif len(self._buffered) < self._max_buffered_lines:
+                        self._buffered.append(line)
+                return
+        on_lines(lines)
+
+    def wait_until_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.process.poll() is None:
+            if self._ready.wait(0.05):
+                return True
+        return self._ready.is_set()
+
+    def launch(self, spec: Dict[str, Any], env: Dict[str, str], on_lines: Callable[[List[str]], None],
+               cwd: Optional[str] = None, timeout: float = 10.0) -> ManagedProcess:
+        import errno
+        with self._lock:
+            self._on_lines = on_lines
+            buffered, self._buffered = self._buffered, []
+        if buffered:
+            on_lines(buffered)
+        payload = json.dumps({**spec, "env": mark_managed(env), "cwd": cwd}).encode("utf-8")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                # non blocking so a helper that died after reporting ready can not hang the launch
+                fd = os.open(self._fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as e:
+                if e.errno != errno.ENXIO or self.process.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise DBTunnelError(f"Warm interpreter {self.process.pid} did not accept the launch") from e
+                time.sleep(0.01)
+        try:
+            os.set_blocking(fd, True)
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
+        self._cleanup()
+        return self.process
+
+    def _cleanup(self):
+        import shutil
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def close(self):
+        self.process.kill()
+        self._cleanup()
+
+
+class WarmInterpreterPool:
+    """
+    Keeps `size` interpreters with heavy modules (streamlit, gradio, pandas, ...) imported ahead of time, so the
+    next app launch skips those imports. Each acquire starts a replacement in the background, which is what makes
+    supervisor restarts and later runs in the same notebook warm as well.
+    """
+
+    def __init__(self, modules: List[str], size: int = 1):
+        self.modules = list(modules)
+        self.size = size
+        self._idle: List[WarmInterpreter] = []
+        self._lock = threading.Lock()
+        self.fill()
+
+    def fill(self):
+        with self._lock:
+            self._idle = [interpreter for interpreter in self._idle if interpreter.process.poll() is None]
+            while len(self._idle) < self.size:
+                self._idle.append(WarmInterpreter(self.modules))
+
+    def acquire(self, timeout: float = 300.0) -> Optional[WarmInterpreter]:
+        """
+        Oldest live interpreter, waiting for it to finish importing since it is still ahead of a cold start. None
+        if there is none or it does not get ready in time.
+        """
+        with self._lock:
+            interpreter = None
+            while self._idle and interpreter is None:
+                candidate = self._idle.pop(0)
+                if candidate.process.poll() is None:
+                    interpreter = candidate
+        threading.Thread(target=self.fill, name="dbtunnel-warm-pool-fill", daemon=True).start()
+        if interpreter is None:
+            return None
+        if not interpreter.wait_until_ready(timeout):
+            interpreter.close()
+            return None
+        return interpreter
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for interpreter in idle:
+            interpreter.close()
+
+
+_warm_pools: Dict[tuple, WarmInterpreterPool] = {}
+_warm_pools_lock = threading.Lock()
+
+
+def get_warm_pool(modules: List[str], size: int = 1) -> WarmInterpreterPool:
+    """
+    Pools are shared per module list for the life of the notebook, so a tunnel rerun finds the spare warmed up by
+    the previous run.
+    """
+    key = tuple(sorted(set(modules)))
+    with _warm_pools_lock:
+        pool = _warm_pools.get(key)
+        if pool is None:
+            pool = _warm_pools[key] = WarmInterpreterPool(list(key), size=size)
+        elif pool.size < size:
+            pool.size = size
+            pool.fill()
+        return pool
+
+
+@atexit.register
+def _close_warm_pools():
+    with _warm_pools_lock:
+        pools = list(_warm_pools.values())
+        _warm_pools.clear()
+    for pool in pools:
+        pool.close()
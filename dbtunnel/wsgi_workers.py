@@ -0,0 +1,67 @@
+import sys
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List
+
+from dbtunnel.server_profiles import ServerProfile
+
+
+@dataclass
+class WsgiWorkerSettings:
+    workers: int = 2
+    # threads per worker, more than one switches gunicorn to the gthread worker
+    threads: int = 1
+    # "module:app" imported by every worker, run as a separate gunicorn process
+    app_ref: Optional[str] = None
+    timeout: int = 120
+    # fork gunicorn off the app object built in the notebook instead, opt in only, see with_wsgi_workers
+    fork: bool = False
+
+
+def gunicorn_options(settings: WsgiWorkerSettings, port: int, profile: ServerProfile,
+                     env: Dict[str, str]) -> Dict[str, Any]:
+    """
+    gunicorn settings by their config name, shared by the command line of the app_ref mode and the forked
+    application.
+    """
+    return {"bind": f"0.0.0.0:{port}",
+            "workers": settings.workers,
+            "threads": settings.threads,
+            "worker_class": "gthread" if settings.threads > 1 else "sync",
+            "timeout": settings.timeout,
+            "backlog": profile.backlog,
+            "keepalive": profile.timeout_keep_alive,
+            "raw_env": [f"{k}={v}" for k, v in env.items()]}
+
+
+# command line flags that are not the setting name with dashes
+_GUNICORN_FLAGS = {"raw_env": "--env", "keepalive": "--keep-alive"}
+
+
+def gunicorn_command(options: Dict[str, Any], app_ref: str) -> List[str]:
+    cmd = [sys.executable, "-m", "gunicorn"]
+    for key, value in options.items():
+        for item in (value if isinstance(value, list) else [value]):
+            flag = _GUNICORN_FLAGS.get(key, f"--{key.replace('_', '-')}")
+            cmd.extend([flag, str(item)])
+    cmd.append(app_ref)
+    return cmd
+
+
+def _gunicorn_application(wsgi_app, options: Dict[str, Any]):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return wsgi_app
+
+    return Application()
+
+
+def _run_gunicorn(wsgi_app, options: Dict[str, Any]):
+    # runs in a process forked off the notebook, gunicorn then forks its workers off this one
+    _gunicorn_application(wsgi_app, options).run()
@@ -55,6 +55,10 @@ setup(
             "fastapi",
             "uvicorn",  # no websockets
         ],
+        "gunicorn": [
+            # multi process serving for flask and dash, see with_wsgi_workers
+            "gunicorn",
+        ],
         "sql": [
             "databricks-sql-connector"
         ],
@@ -74,10 +78,11 @@ setup(
         "asgiproxy": [
             "aiohttp",
             "starlette",
-            "uvicorn",
+            "uvicorn>=0.29.0",  # DrainingServer wraps Server.capture_signals, added in 0.29.0
             "websockets",
             "python-multipart",  # we are using this for auth check via form uploads
-            "cachetools"
+            "cachetools",
+            "cryptography",  # session cookies are encrypted
         ],
         "shiny": [
             "shiny",
@@ -85,6 +90,7 @@ setup(
         "dev": [
             "mkdocs-material",
             "mkdocs-jupyter",
+            "pytest",
         ],
         "cli": [
             "click",
@@ -0,0 +1,135 @@
+import asyncio
+
+from dbtunnel.vendor.asgiproxy.balancer import REPLICA_COOKIE_NAME, UpstreamPool
+from dbtunnel.vendor.asgiproxy.config import UPSTREAM_REPLICA_SCOPE_KEY
+from dbtunnel.vendor.asgiproxy.context import ProxyContext
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks, framework_specific_proxy_config
+from dbtunnel.vendor.asgiproxy.simple_proxy import proxy_to_upstream
+
+
+def make_scope(user=None, replica=None, cookies=()):
+    headers = []
+    if user is not None:
+        headers.append((b"x-databricks-user-id", user.encode("utf-8")))
+    cookies = [*cookies, *([f"{REPLICA_COOKIE_NAME}={replica}"] if replica is not None else [])]
+    if cookies:
+        headers.append((b"cookie", "; ".join(cookies).encode("utf-8")))
+    return {"type": "http", "path": "/", "root_path": "/driver-proxy/o/1/c/8080/", "headers": headers}
+
+
+def with_pool(replicas: int, scenario, **kwargs):
+    """
+    Run scenario(pool) on an event loop with every replica accepting connections, so the health checker the pool
+    starts on first use keeps them all admitted.
+    """
+
+    async def main():
+        servers = [await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0) for _ in range(replicas)]
+        pool = UpstreamPool([f"http://127.0.0.1:{s.sockets[0].getsockname()[1]}" for s in servers],
+                            health_interval=60, **kwargs)
+        try:
+            return await scenario(pool)
+        finally:
+            pool.close()
+            for server in servers:
+                server.close()
+
+    return asyncio.run(main())
+
+
+def test_cookie_pins_the_replica():
+    async def scenario(pool):
+        return [pool.pick(make_scope(replica=2)).index for _ in range(3)]
+
+    assert with_pool(3, scenario) == [2, 2, 2]
+
+
+def test_user_header_pins_the_replica_without_a_cookie():
+    async def scenario(pool):
+        first = pool.pick(make_scope(user="alice"))
+        # another user's session goes elsewhere, alice's websocket without the cookie follows her page
+        other = pool.pick(make_scope(user="bob"))
+        return first.index, other.index, pool.pick(make_scope(user="alice")).index
+
+    first, other, again = with_pool(2, scenario)
+    assert first != other
+    assert again == first
+
+
+def test_new_sessions_are_spread_over_idle_replicas():
+    async def scenario(pool):
+        return sorted(pool.pick(make_scope()).index for _ in range(3))
+
+    assert with_pool(3, scenario) == [0, 1, 2]
+
+
+def test_ties_rotate_once_earlier_sessions_have_ended():
+    async def scenario(pool):
+        picks = []
+        for _ in range(4):
+            # each session opens and closes its connection before the next one arrives
+            replica = pool.pick(make_scope())
+            with pool.track(replica):
+                picks.append(replica.index)
+        pool.replicas[0].sessions += 10
+        # sessions placed long ago do not push new ones away from a replica that is idle now
+        picks.extend(pool.pick(make_scope()).index for _ in range(2))
+        return picks
+
+    assert with_pool(2, scenario) == [0, 1, 0, 1, 0, 1]
+
+
+def test_new_sessions_go_to_the_least_busy_replica():
+    async def scenario(pool):
+        with pool.track(pool.replicas[0]), pool.track(pool.replicas[1]):
+            return pool.pick(make_scope()).index
+
+    assert with_pool(3, scenario) == 2
+
+
+def test_failing_replica_is_ejected_and_its_sessions_move():
+    async def scenario(pool):
+        scope = make_scope(user="alice", replica=0)
+        pool.pick(scope)
+        # let the first health check round finish before counting failures
+        await asyncio.sleep(0.1)
+        assert pool.report_failure(scope).index == 0
+        moved = pool.report_failure(scope)
+        assert scope[UPSTREAM_REPLICA_SCOPE_KEY] is moved
+        # the cookie still points at the ejected replica
+        return moved.index, pool.replicas[0].healthy, pool.pick(make_scope(user="alice", replica=0)).index
+
+    moved, healthy, next_pick = with_pool(2, scenario, eject_after=2)
+    assert moved == 1
+    assert healthy is False
+    assert next_pick == 1
+
+
+def test_proxy_to_upstream_sets_the_replica_cookie_once():
+    async def handler(*, context, scope, receive, send):
+        handled.append(scope)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def request(context, scope):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await proxy_to_upstream(handler, context, scope, None, send)
+        return [value for key, value in sent[0]["headers"] if key == b"set-cookie"]
+
+    async def scenario(pool):
+        config = framework_specific_proxy_config[Frameworks.GRADIO](url_base_path="/", service_host="127.0.0.1",
+                                                                    service_port=9999)
+        context = ProxyContext(config, upstream_pool=pool)
+        first = await request(context, make_scope(cookies=["theme=dark"]))
+        pinned = await request(context, make_scope(replica=1, cookies=["theme=dark"]))
+        return first, pinned
+
+    handled = []
+    first, pinned = with_pool(2, scenario)
+    assert first == [f"{REPLICA_COOKIE_NAME}=0; Path=/driver-proxy/o/1/c/8080/; HttpOnly; SameSite=Lax".encode()]
+    assert pinned == []
+    # the app never sees the replica cookie, other cookies are passed on
+    assert [dict(scope["headers"])[b"cookie"] for scope in handled] == [b"theme=dark", b"theme=dark"]
@@ -0,0 +1,94 @@
+import asyncio
+
+from dbtunnel.vendor.asgiproxy.context import ProxyContext
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks, framework_specific_proxy_config
+from dbtunnel.vendor.asgiproxy.proxies.websocket import WebSocketProxyContext
+from dbtunnel.vendor.asgiproxy.simple_proxy import make_simple_proxy_app
+
+
+class FakeUpstream:
+    closed = False
+
+
+def make_context() -> ProxyContext:
+    config = framework_specific_proxy_config[Frameworks.GRADIO](url_base_path="/",
+                                                                service_host="127.0.0.1",
+                                                                service_port=9999)
+    return ProxyContext(config)
+
+
+def http_scope(path="/"):
+    return {"type": "http", "method": "GET", "path": path, "root_path": "", "query_string": b"", "headers": [],
+            "server": ("127.0.0.1", 8080), "scheme": "http", "http_version": "1.1"}
+
+
+async def request(app, path="/"):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(http_scope(path), receive, send)
+    return sent[0]["status"]
+
+
+def make_app(context, release: asyncio.Event):
+    async def slow_handler(*, context, scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"done"})
+
+    return make_simple_proxy_app(context, framework=Frameworks.GRADIO, proxy_port=8080,
+                                 proxy_http_handler=slow_handler)
+
+
+async def close_when_told(context: ProxyContext, ws_ctx: WebSocketProxyContext):
+    # stands in for proxy_websocket, which unregisters the pair once its pumps stopped
+    while ws_ctx.close_reason is None:
+        await asyncio.sleep(0.01)
+    context.websockets.pop(ws_ctx.id)
+
+
+def test_drain_rejects_new_requests_and_waits_for_in_flight_ones():
+    async def scenario():
+        context = make_context()
+        release = asyncio.Event()
+        app = make_app(context, release)
+        ws_ctx = WebSocketProxyContext(client_ws=None, upstream_ws=FakeUpstream(), user="a")
+        context.websockets[ws_ctx.id] = ws_ctx
+        ws_handler = asyncio.create_task(close_when_told(context, ws_ctx))
+
+        in_flight = asyncio.create_task(request(app))
+        await asyncio.sleep(0.05)
+        assert context.in_flight == 1
+        drain = asyncio.create_task(context.drain(timeout=5))
+        await asyncio.sleep(0.05)
+        assert await request(app) == 503
+        # websockets stay up until the http requests have finished
+        assert not drain.done() and ws_ctx.close_reason is None
+
+        release.set()
+        assert await in_flight == 200
+        assert await drain is True
+        await ws_handler
+        return ws_ctx
+
+    ws_ctx = asyncio.run(scenario())
+    assert ws_ctx.close_code == 1001
+    assert ws_ctx.close_reason == "proxy draining"
+
+
+def test_drain_gives_up_on_requests_that_do_not_finish():
+    async def scenario():
+        context = make_context()
+        release = asyncio.Event()
+        stuck = asyncio.create_task(request(make_app(context, release)))
+        await asyncio.sleep(0.05)
+        drained = await context.drain(timeout=0.1)
+        stuck.cancel()
+        return drained
+
+    assert asyncio.run(scenario()) is False
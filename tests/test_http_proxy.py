@@ -0,0 +1,89 @@
+import asyncio
+import socket
+
+from aiohttp import web
+
+from dbtunnel.vendor.asgiproxy.context import ProxyContext
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks, framework_specific_proxy_config
+from dbtunnel.vendor.asgiproxy.proxies.http import INCOMING_STREAMING_THRESHOLD, proxy_http
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_echo_app(port: int) -> web.AppRunner:
+    async def echo(request: web.Request):
+        return web.Response(body=b"echo: " + await request.read())
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", echo)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def send_request(context: ProxyContext, method: str, body: bytes, headers):
+    scope = {"type": "http", "method": method, "path": "/submit", "root_path": "", "query_string": b"",
+             "headers": headers, "server": ("127.0.0.1", 8080), "scheme": "http", "http_version": "1.1"}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        # the client sends its body once, after that it only ever disconnects
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await proxy_http(context=context, scope=scope, receive=receive, send=send)
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def make_context(port: int, upstream_wait_timeout: float) -> ProxyContext:
+    config = framework_specific_proxy_config[Frameworks.GRADIO](url_base_path="/", service_host="127.0.0.1",
+                                                                service_port=port)
+    return ProxyContext(config, upstream_wait_timeout=upstream_wait_timeout)
+
+
+def test_post_is_retried_with_its_body_once_the_app_is_back():
+    async def scenario():
+        port = free_port()
+        context = make_context(port, upstream_wait_timeout=10)
+        request = asyncio.create_task(send_request(context, "POST", b"payload",
+                                                   [(b"content-length", b"7"),
+                                                    (b"content-type", b"text/plain")]))
+        # the first attempts fail to connect while the app is down
+        await asyncio.sleep(0.8)
+        assert not request.done()
+        runner = await start_echo_app(port)
+        try:
+            return await asyncio.wait_for(request, 10)
+        finally:
+            await context.close()
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == (200, b"echo: payload")
+
+
+def test_streamed_upload_fails_fast_while_the_app_is_down():
+    async def scenario():
+        context = make_context(free_port(), upstream_wait_timeout=10)
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        try:
+            # too large to buffer, the body is streamed and can not be sent twice
+            body = b"x" * (INCOMING_STREAMING_THRESHOLD + 1)
+            status, _ = await send_request(context, "POST", body, [(b"content-length", str(len(body)).encode())])
+        finally:
+            await context.close()
+        return status, loop.time() - started_at
+
+    status, elapsed = asyncio.run(scenario())
+    assert status == 502
+    assert elapsed < 5
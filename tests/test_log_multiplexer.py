@@ -0,0 +1,66 @@
+import sys
+import threading
+
+from dbtunnel.utils import LogMultiplexer, spawn
+
+
+class Collector:
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, lines):
+        with self.lock:
+            self.batches.append(list(lines))
+
+    @property
+    def lines(self):
+        return [line for batch in self.batches for line in batch]
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def test_lines_are_delivered_in_batches():
+    collector = Collector()
+    process = spawn(python("for i in range(1000): print(i)"), {}, collector)
+    assert process.wait(10) == 0
+    assert collector.lines == [str(i) for i in range(1000)]
+    assert len(collector.batches) < 1000
+
+
+def test_stderr_and_the_unterminated_last_line_are_kept():
+    collector = Collector()
+    process = spawn(python("import sys; print('out'); sys.stderr.write('err\\n'); sys.stdout.write('tail')"),
+                    {}, collector)
+    process.wait(10)
+    assert sorted(collector.lines) == ["err", "out", "tail"]
+
+
+def test_exit_code_and_handle():
+    process = spawn(python("raise SystemExit(7)"), {}, Collector())
+    process.join(10)
+    assert not process.is_alive()
+    assert process.poll() == 7
+    assert process.pid is not None
+
+
+def test_failing_callback_kills_the_process():
+    def on_lines(lines):
+        raise RuntimeError("boom")
+
+    process = spawn(python("import time\nwhile True:\n    print('x', flush=True)\n    time.sleep(0.01)"), {},
+                    on_lines)
+    assert process.wait(10) is not None
+    assert isinstance(process.error, RuntimeError)
+
+
+def test_concurrent_processes_keep_their_own_output():
+    collectors = [Collector() for _ in range(10)]
+    processes = [spawn(python(f"print({i})"), {}, collector) for i, collector in enumerate(collectors)]
+    for i, (process, collector) in enumerate(zip(processes, collectors)):
+        assert process.wait(10) == 0
+        assert collector.lines == [str(i)]
+    assert LogMultiplexer.get() is LogMultiplexer.get()
@@ -0,0 +1,97 @@
+import gzip
+import logging
+import queue
+
+from dbtunnel.utils import (ArchivingTimedRotatingFileHandler, DroppingQueueHandler, LogArchiver,
+                            get_dropped_log_records, get_logger)
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.makeLogRecord({"name": "test", "levelno": level, "levelname": logging.getLevelName(level),
+                                  "msg": msg})
+
+
+def drain(log_queue: queue.Queue):
+    records = []
+    while not log_queue.empty():
+        records.append(log_queue.get_nowait())
+    return records
+
+
+def test_drop_oldest_keeps_the_newest_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=5))
+    for i in range(20):
+        handler.enqueue(make_record(str(i)))
+    assert [record.msg for record in drain(handler.queue)] == ["15", "16", "17", "18", "19"]
+    # the notice for the first drop was queued right away and then evicted like any other record
+    assert handler.dropped == 16
+
+
+def test_sample_keeps_one_in_every_n_overflowing_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=5), overflow_policy="sample", sample_every=5)
+    for i in range(30):
+        handler.enqueue(make_record(str(i)))
+    # 25 overflowing records, 5 of them sampled in by evicting a queued record, plus the drop notice's eviction
+    assert handler.dropped == 26
+    assert len(drain(handler.queue)) == 5
+
+
+def test_errors_are_never_dropped_for_sampling():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2), overflow_policy="sample", sample_every=1000)
+    handler.enqueue(make_record("a"))
+    handler.enqueue(make_record("b"))
+    handler.enqueue(make_record("boom", logging.ERROR))
+    assert [record.msg for record in drain(handler.queue)] == ["b", "boom"]
+
+
+def test_drops_are_reported_once_there_is_room():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=3))
+    for i in range(5):
+        handler.enqueue(make_record(str(i)))
+    drain(handler.queue)
+    handler.enqueue(make_record("next"))
+    notice, record = drain(handler.queue)
+    assert notice.levelno == logging.WARNING
+    assert notice.getMessage() == "Dropped 2 log records, the log queue was full (policy: drop-oldest)"
+    assert record.msg == "next"
+
+
+def test_loggers_with_the_same_app_name_share_a_pipeline(tmp_path):
+    log_file = tmp_path / "app" / "app.log"
+    first = get_logger(app_name="dbtunnel-test-shared", cluster_logging_file_path=log_file)
+    handler = first.handlers[0]
+    second = get_logger(app_name="dbtunnel-test-shared", cluster_logging_file_path=log_file)
+    assert second.handlers == [handler]
+    assert get_dropped_log_records()["dbtunnel-test-shared"] == 0
+
+    third = get_logger(app_name="dbtunnel-test-shared", cluster_logging_file_path=log_file, queue_size=10)
+    assert third.handlers[0] is not handler
+
+
+def test_rotated_logs_are_archived_with_gzip(tmp_path):
+    archive = tmp_path / "archive"
+    (tmp_path / "logs").mkdir()
+    handler = ArchivingTimedRotatingFileHandler(archive, str(tmp_path / "logs" / "app.log"), when="S",
+                                                backupCount=3, compression="gzip")
+    try:
+        handler.emit(make_record("before rotation"))
+        handler.doRollover()
+        handler.emit(make_record("after rotation"))
+    finally:
+        handler.close()
+    LogArchiver.get()._queue.join()
+
+    archived = list(archive.iterdir())
+    assert len(archived) == 1 and archived[0].name.startswith("app.log.") and archived[0].suffix == ".gz"
+    assert gzip.decompress(archived[0].read_bytes()) == b"before rotation\n"
+    # the hard link used for staging is gone once the copy is in place
+    assert list((tmp_path / "logs" / ".archiving").iterdir()) == []
+
+
+def test_archiving_without_compression_copies_the_file(tmp_path):
+    staged = tmp_path / "app.log.1"
+    staged.write_bytes(b"x" * 100)
+    (tmp_path / "archive").mkdir()
+    LogArchiver(max_workers=0).archive(staged, tmp_path / "archive", "none")
+    assert (tmp_path / "archive" / "app.log.1").read_bytes() == b"x" * 100
+    assert not (tmp_path / "archive" / "app.log.1.tmp").exists()
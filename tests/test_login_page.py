@@ -0,0 +1,27 @@
+from dbtunnel.vendor.asgiproxy.simple_proxy import LoginPageTemplate, get_login_content, get_login_template
+
+
+def test_render_fills_every_placeholder():
+    template = LoginPageTemplate("<a href='{root_path}{login_path}'>{user_name}</a>")
+    assert template.render(root_path="/app", login_path="/dbtunnel/login", user_name="me") == \
+        "<a href='/app/dbtunnel/login'>me</a>"
+
+
+def test_render_escapes_values():
+    template = LoginPageTemplate("<p>{user_name}</p>")
+    assert template.render(user_name="<script>alert('x')</script>") == \
+        "<p>&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt;</p>"
+
+
+def test_render_allows_a_missing_user_name():
+    assert LoginPageTemplate("<p>{user_name}</p>").render(user_name=None) == "<p></p>"
+
+
+def test_login_page_is_rendered_from_the_packaged_template():
+    page = get_login_content(root_path="/driver-proxy/o/1/c/8080/",
+                             workspace_url="https://example.cloud.databricks.com",
+                             user_name="a&b@example.com")
+    assert "/driver-proxy/o/1/c/8080/dbtunnel/login" in page
+    assert "a&amp;b@example.com" in page
+    assert "{" + "user_name}" not in page
+    assert get_login_template() is get_login_template()
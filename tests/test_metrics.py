@@ -0,0 +1,89 @@
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from dbtunnel.monitor import ResourceMonitor
+from dbtunnel.vendor.asgiproxy.control import default_metrics_path
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks
+from dbtunnel.vendor.asgiproxy.server import EmbeddedProxyServer, make_proxy_context, make_proxy_server_config
+from dbtunnel.vendor.asgiproxy.simple_proxy import get_app_path
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.parametrize("path,root_path,expected", [
+    ("/dbtunnel/metrics", "", "/dbtunnel/metrics"),
+    ("/driver-proxy/o/1/c/8080/dbtunnel/metrics", "/driver-proxy/o/1/c/8080/", "/dbtunnel/metrics"),
+    # uvicorn 0.54 prepends root_path to a path that already carries it
+    ("/driver-proxy/o/1/c/8080/driver-proxy/o/1/c/8080/dbtunnel/metrics", "/driver-proxy/o/1/c/8080/",
+     "/dbtunnel/metrics"),
+    ("/driver-proxy/o/1/c/8080/", "/driver-proxy/o/1/c/8080/", "/"),
+    ("/driver-proxy/o/1/c/8080", "/driver-proxy/o/1/c/8080/", "/"),
+    ("/driver-proxy/o/1/c/80801/dbtunnel/metrics", "/driver-proxy/o/1/c/8080",
+     "/driver-proxy/o/1/c/80801/dbtunnel/metrics"),
+])
+def test_get_app_path(path, root_path, expected):
+    assert get_app_path({"path": path, "root_path": root_path}) == expected
+
+
+def test_monitor_samples_the_tracked_processes(tmp_path):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    metrics_path = tmp_path / "metrics" / "8080.json"
+    monitor = ResourceMonitor(metrics_path, interval=0.05)
+    try:
+        monitor.track("app", child.pid)
+        deadline = time.monotonic() + 10
+        while not metrics_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        sample = json.loads(metrics_path.read_text())
+        app = sample["processes"]["app"]
+        assert app["pid"] == child.pid and app["running"] is True
+        assert app["rss_bytes"] > 0 and app["threads"] >= 1
+        assert sample["total"]["rss_bytes"] == app["rss_bytes"]
+
+        child.kill()
+        child.wait()
+        assert monitor.sample()["processes"]["app"] == {"pid": child.pid, "running": False}
+    finally:
+        child.kill()
+        monitor.stop()
+    assert not metrics_path.exists()
+
+
+def test_metrics_endpoint_serves_the_monitor_sample(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    proxy_port = free_port()
+    default_metrics_path(proxy_port).parent.mkdir(parents=True)
+    default_metrics_path(proxy_port).write_text(json.dumps({"total": {"rss_bytes": 1}}))
+    url_base_path = f"/driver-proxy/o/1/c/{proxy_port}/"
+    proxy_context = make_proxy_context(framework=Frameworks.GRADIO,
+                                       url_base_path=url_base_path,
+                                       service_host="127.0.0.1",
+                                       # nothing listens here, the metrics must not be proxied to the app
+                                       service_port=free_port())
+    config = make_proxy_server_config(proxy_context,
+                                      framework=Frameworks.GRADIO,
+                                      host="127.0.0.1",
+                                      port=proxy_port,
+                                      url_base_path=url_base_path,
+                                      log_level="warning")
+    server = EmbeddedProxyServer(config, proxy_context).start()
+    try:
+        assert server.wait_until_started(10) is not None
+        for path in ["/dbtunnel/metrics", f"{url_base_path}dbtunnel/metrics"]:
+            with urllib.request.urlopen(f"http://127.0.0.1:{proxy_port}{path}", timeout=10) as resp:
+                assert resp.status == 200
+                metrics = json.loads(resp.read())
+            assert metrics == {"total": {"rss_bytes": 1}, "proxy_connections": {"websockets": 0}}
+    finally:
+        server.stop()
+        server.join(10)
@@ -0,0 +1,81 @@
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from dbtunnel.utils import DBTUNNEL_MANAGED_ENV, get_port_owners, kill_port, mark_managed
+
+LISTENER = """
+import socket, sys, time
+server = socket.socket()
+server.bind(("127.0.0.1", 0))
+server.listen()
+print(server.getsockname()[1], flush=True)
+while True:
+    time.sleep(1)
+"""
+
+
+@pytest.fixture
+def listen():
+    processes = []
+
+    def start(env):
+        process = subprocess.Popen([sys.executable, "-c", LISTENER], env={**os.environ, **env},
+                                   stdout=subprocess.PIPE, text=True)
+        processes.append(process)
+        return process, int(process.stdout.readline())
+
+    yield start
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def test_owners_of_a_listening_port(listen):
+    process, port = listen(mark_managed({}))
+    owners = get_port_owners(port)
+    assert [owner.pid for owner in owners] == [process.pid]
+    assert owners[0].managed_by == os.getpid()
+    assert "time.sleep" in owners[0].cmdline
+
+
+def test_unmarked_processes_are_not_managed(listen):
+    _, port = listen({})
+    (owner,) = get_port_owners(port)
+    assert not owner.managed
+
+
+def test_nothing_listening():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    assert get_port_owners(port) == []
+
+
+def test_kill_port_stops_our_own_children(listen):
+    process, port = listen(mark_managed({}))
+    assert [owner.pid for owner in kill_port(port, timeout=5)] == [process.pid]
+    assert process.wait(5) is not None
+    assert get_port_owners(port) == []
+
+
+def test_kill_port_leaves_other_processes_alone(listen):
+    unmarked, unmarked_port = listen({})
+    # started by another live dbtunnel process, pid 1 stands in for that notebook
+    other, other_port = listen({DBTUNNEL_MANAGED_ENV: "1"})
+    assert kill_port(unmarked_port) == []
+    assert kill_port(other_port) == []
+    assert unmarked.poll() is None and other.poll() is None
+    assert [owner.pid for owner in kill_port(other_port, only_own=False)] == [other.pid]
+
+
+def test_kill_port_stops_children_of_a_dead_kernel(listen):
+    kernel = subprocess.Popen([sys.executable, "-c", "pass"])
+    kernel.wait()
+    # started by a notebook kernel that has since been restarted
+    orphan, port = listen({DBTUNNEL_MANAGED_ENV: str(kernel.pid)})
+    assert [owner.pid for owner in kill_port(port)] == [orphan.pid]
+    assert orphan.wait(5) is not None
@@ -0,0 +1,90 @@
+import json
+import socket
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from dbtunnel.errors import DBTunnelError
+from dbtunnel.ports import PortRegistry
+
+PORT_RANGE = (23000, 23100)
+
+
+def claim_in_process(path, owner):
+    return PortRegistry(path, port_range=PORT_RANGE).claim(owner)
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_concurrent_claims_get_distinct_ports(tmp_path):
+    path = tmp_path / "ports.json"
+    with ProcessPoolExecutor(4) as pool:
+        ports = list(pool.map(claim_in_process, [path] * 12, [f"app-{i}" for i in range(12)]))
+    assert len(set(ports)) == 12
+
+
+def test_preferred_port_is_claimed_first(tmp_path):
+    registry = PortRegistry(tmp_path / "ports.json", port_range=PORT_RANGE)
+    assert registry.claim("a", preferred=PORT_RANGE[0] + 7) == PORT_RANGE[0] + 7
+    assert registry.claim("b", preferred=PORT_RANGE[0] + 7) != PORT_RANGE[0] + 7
+
+
+def test_ports_of_dead_processes_are_reclaimed(tmp_path):
+    path = tmp_path / "ports.json"
+    port = PORT_RANGE[0] + 3
+    path.write_text(json.dumps({str(port): {"owner": "gone", "pid": dead_pid(), "claimed_at": 0}}))
+    registry = PortRegistry(path, port_range=PORT_RANGE)
+    assert registry.claim("a", preferred=port) == port
+    assert registry.entries()[port]["owner"] == "a"
+
+
+def test_ports_in_use_are_skipped(tmp_path):
+    with socket.socket() as listener:
+        listener.bind(("0.0.0.0", PORT_RANGE[0] + 5))
+        listener.listen()
+        registry = PortRegistry(tmp_path / "ports.json", port_range=PORT_RANGE)
+        assert registry.claim("a", preferred=PORT_RANGE[0] + 5) != PORT_RANGE[0] + 5
+
+
+def test_release_frees_the_port(tmp_path):
+    registry = PortRegistry(tmp_path / "ports.json", port_range=(PORT_RANGE[0], PORT_RANGE[0]))
+    port = registry.claim("a")
+    with pytest.raises(DBTunnelError):
+        registry.claim("b")
+    registry.release(port, "a")
+    assert registry.claim("b") == port
+
+
+def test_reserve_refuses_ports_held_by_another_live_owner(tmp_path):
+    registry = PortRegistry(tmp_path / "ports.json", port_range=PORT_RANGE)
+    port = PORT_RANGE[0] + 9
+    registry.reserve("a", port)
+    # a rerun of the same tunnel in the same process keeps its reservation
+    registry.reserve("a", port)
+    with pytest.raises(DBTunnelError, match="already held by a"):
+        registry.reserve("b", port)
+    assert registry.entries()[port]["owner"] == "a"
+
+
+def test_reserve_takes_over_ports_of_dead_processes(tmp_path):
+    path = tmp_path / "ports.json"
+    port = PORT_RANGE[0] + 9
+    path.write_text(json.dumps({str(port): {"owner": "gone", "pid": dead_pid(), "claimed_at": 0}}))
+    registry = PortRegistry(path, port_range=PORT_RANGE)
+    registry.reserve("a", port)
+    assert registry.entries()[port]["owner"] == "a"
+
+
+def test_release_by_another_owner_keeps_the_entry(tmp_path):
+    registry = PortRegistry(tmp_path / "ports.json", port_range=PORT_RANGE)
+    port = registry.claim("a")
+    registry.release(port, "b")
+    assert registry.entries()[port]["owner"] == "a"
+    registry.release(port, "a")
+    assert port not in registry.entries()
@@ -0,0 +1,64 @@
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from dbtunnel.vendor.asgiproxy.control import ProxyDaemonClient, ProxyDaemonError
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def can_connect(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+@pytest.fixture
+def client():
+    # unix socket paths are limited to ~100 bytes, pytest's tmp_path can be longer
+    with tempfile.TemporaryDirectory(prefix="dbt-") as tmp:
+        daemon = ProxyDaemonClient(Path(tmp) / "daemon.sock", timeout=10)
+        daemon.ensure_running(timeout=30)
+        try:
+            yield daemon
+        finally:
+            daemon.request("shutdown")
+            deadline = time.monotonic() + 10
+            while daemon.is_running() and time.monotonic() < deadline:
+                time.sleep(0.1)
+
+
+def test_register_and_deregister_round_trip(client):
+    proxy_port = free_port()
+    prefix = f"/driver-proxy/o/0/test/{proxy_port}/"
+    route = client.register(framework="gradio", url_base_path=prefix, proxy_port=proxy_port,
+                            service_port=free_port(), service_host="127.0.0.1")["route"]
+    assert route["proxy_port"] == proxy_port
+    assert prefix in client.routes()
+    assert can_connect(proxy_port)
+
+    assert client.deregister(prefix)["removed"] is True
+    assert client.routes() == {}
+    assert client.deregister(prefix)["removed"] is False
+    deadline = time.monotonic() + 5
+    while can_connect(proxy_port) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert not can_connect(proxy_port)
+
+
+def test_port_conflicts_are_reported_to_the_client(client):
+    proxy_port = free_port()
+    client.register(framework="gradio", url_base_path="/a/", proxy_port=proxy_port, service_port=free_port())
+    with pytest.raises(ProxyDaemonError, match="already used"):
+        client.register(framework="gradio", url_base_path="/b/", proxy_port=proxy_port, service_port=free_port())
+    with pytest.raises(ProxyDaemonError, match="Unknown op"):
+        client.request("nope")
@@ -0,0 +1,62 @@
+from dbtunnel.vendor.asgiproxy.utils.sessions import SessionSigner, get_cookie_from_scope, \
+    load_or_create_session_secret, remove_cookie_from_scope
+
+SECRET = b"s" * 32
+
+
+def tamper(value: str) -> str:
+    middle = len(value) // 2
+    return value[:middle] + ("A" if value[middle] != "A" else "B") + value[middle + 1:]
+
+
+def test_round_trip():
+    signer = SessionSigner(SECRET)
+    assert signer.verify(signer.sign("me@example.com", "dapi123"), user="me@example.com") == "dapi123"
+
+
+def test_tampered_session_is_rejected():
+    signer = SessionSigner(SECRET)
+    assert signer.verify(tamper(signer.sign("me@example.com", "dapi123")), user="me@example.com") is None
+
+
+def test_session_from_another_secret_is_rejected():
+    value = SessionSigner(SECRET).sign("me@example.com", "dapi123")
+    assert SessionSigner(b"t" * 32).verify(value, user="me@example.com") is None
+
+
+def test_expired_session_is_rejected():
+    signer = SessionSigner(SECRET, max_age=-10)
+    assert signer.verify(signer.sign("me@example.com", "dapi123"), user="me@example.com") is None
+
+
+def test_session_of_another_user_is_rejected():
+    signer = SessionSigner(SECRET)
+    assert signer.verify(signer.sign("me@example.com", "dapi123"), user="you@example.com") is None
+
+
+def test_session_is_rejected_when_the_request_has_no_user():
+    signer = SessionSigner(SECRET)
+    # e.g. a relay request without the driver proxy's user headers
+    for user in (None, ""):
+        assert signer.verify(signer.sign("me@example.com", "dapi123"), user=user) is None
+
+
+def test_garbage_is_rejected():
+    signer = SessionSigner(SECRET)
+    for value in (None, "", "abc", "a.b", "...."):
+        assert signer.verify(value, user="me@example.com") is None
+
+
+def test_secret_is_created_once_and_shared(tmp_path):
+    path = tmp_path / "session.key"
+    secret = load_or_create_session_secret(path)
+    assert len(secret) == 32
+    assert load_or_create_session_secret(path) == secret
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_session_cookie_is_removed_before_proxying():
+    scope = {"headers": [(b"cookie", b"a=1; dbtunnel_session=xyz; b=2"), (b"host", b"localhost")]}
+    assert get_cookie_from_scope(scope, "dbtunnel_session") == "xyz"
+    remove_cookie_from_scope(scope, "dbtunnel_session")
+    assert scope["headers"] == [(b"cookie", b"a=1; b=2"), (b"host", b"localhost")]
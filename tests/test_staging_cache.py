@@ -0,0 +1,71 @@
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from dbtunnel.utils import StagingCache
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "app.py").write_text("import helper\n")
+    (source / "helper.py").write_text("VALUE = 1\n")
+    return source
+
+
+def stage(cache, app_dir, caplog):
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        staged = cache.stage(str(app_dir / "app.py"))
+    return staged, caplog.records[-1].getMessage().split(": ", 1)[1]
+
+
+def test_unchanged_files_are_reused(tmp_path, app_dir, caplog):
+    cache = StagingCache(tmp_path / "cache")
+    staged, summary = stage(cache, app_dir, caplog)
+    assert summary == "2 copied, 0 removed, 0 unchanged"
+    assert Path(staged).read_text() == "import helper\n"
+    assert (Path(staged).parent / "helper.py").read_text() == "VALUE = 1\n"
+
+    _, summary = stage(cache, app_dir, caplog)
+    assert summary == "0 copied, 0 removed, 2 unchanged"
+
+
+def test_changed_files_are_copied_again(tmp_path, app_dir, caplog):
+    cache = StagingCache(tmp_path / "cache")
+    staged, _ = stage(cache, app_dir, caplog)
+    (app_dir / "helper.py").write_text("VALUE = 22\n")
+    _, summary = stage(cache, app_dir, caplog)
+    assert summary == "1 copied, 0 removed, 1 unchanged"
+    assert (Path(staged).parent / "helper.py").read_text() == "VALUE = 22\n"
+
+
+def test_touched_files_with_the_same_content_are_not_copied(tmp_path, app_dir, caplog):
+    cache = StagingCache(tmp_path / "cache")
+    stage(cache, app_dir, caplog)
+    stat = (app_dir / "helper.py").stat()
+    os.utime(app_dir / "helper.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    _, summary = stage(cache, app_dir, caplog)
+    assert summary == "0 copied, 0 removed, 2 unchanged"
+
+
+def test_removed_and_skipped_files(tmp_path, app_dir, caplog):
+    cache = StagingCache(tmp_path / "cache")
+    (app_dir / "__pycache__").mkdir()
+    (app_dir / "__pycache__" / "helper.pyc").write_bytes(b"\0")
+    staged, _ = stage(cache, app_dir, caplog)
+    assert not (Path(staged).parent / "__pycache__").exists()
+
+    (app_dir / "helper.py").unlink()
+    _, summary = stage(cache, app_dir, caplog)
+    assert summary == "0 copied, 1 removed, 1 unchanged"
+    assert not (Path(staged).parent / "helper.py").exists()
+
+
+def test_large_directories_stage_only_the_script(tmp_path, app_dir, caplog):
+    cache = StagingCache(tmp_path / "cache", max_files=1)
+    staged, _ = stage(cache, app_dir, caplog)
+    assert os.listdir(Path(staged).parent) == ["app.py"]
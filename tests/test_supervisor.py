@@ -0,0 +1,106 @@
+import logging
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from dbtunnel.supervisor import AppSupervisor, SupervisorSettings
+from dbtunnel.utils import log_lines, spawn
+
+# first run crashes, every later run listens on the port until it is killed
+APP = """
+import pathlib, socket, sys, time
+marker = pathlib.Path(sys.argv[2])
+if not marker.exists():
+    marker.touch()
+    sys.exit(1)
+server = socket.socket()
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(("127.0.0.1", int(sys.argv[1])))
+server.listen()
+while True:
+    time.sleep(1)
+"""
+
+
+class FakeTunnel:
+    _flavor = "test-app"
+    _log = logging.getLogger("dbtunnel.tests")
+
+    def _launch(self, cmd, env, on_lines, *, cwd=None, shell=False, role="app"):
+        return spawn(cmd, env, on_lines, cwd=cwd, shell=shell)
+
+
+class RecordingProxy:
+
+    def __init__(self):
+        self.available = None
+        self.reopened = threading.Event()
+
+    def set_upstream_available(self, available: bool):
+        self.available = available
+        if available:
+            self.reopened.set()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_supervisor(cmd, **kwargs) -> AppSupervisor:
+    return AppSupervisor(FakeTunnel(), cmd, {}, on_lines=log_lines(FakeTunnel._log), **kwargs)
+
+
+def test_gives_up_after_max_restarts():
+    supervisor = make_supervisor([sys.executable, "-c", "raise SystemExit(3)"],
+                                 settings=SupervisorSettings(max_restarts=2, backoff_initial=0.01))
+    with pytest.raises(subprocess.CalledProcessError):
+        supervisor.run()
+    assert supervisor.restarts == 2
+
+
+def test_clean_exit_is_not_restarted():
+    supervisor = make_supervisor([sys.executable, "-c", "pass"], settings=SupervisorSettings(backoff_initial=0.01))
+    supervisor.run()
+    assert supervisor.restarts == 0
+
+
+def test_restarted_app_reopens_the_proxy_gate(tmp_path):
+    port = free_port()
+    proxy = RecordingProxy()
+    supervisor = make_supervisor([sys.executable, "-c", APP, str(port), str(tmp_path / "crashed")],
+                                 app_port=port,
+                                 proxy=proxy,
+                                 settings=SupervisorSettings(backoff_initial=0.1, liveness_interval=0.1))
+    runner = threading.Thread(target=supervisor.run, daemon=True)
+    runner.start()
+    try:
+        assert proxy.reopened.wait(10), "proxy gate was never reopened after the restart"
+        assert supervisor.restarts == 1
+        assert proxy.available is True
+    finally:
+        supervisor.stop()
+        runner.join(10)
+    assert not runner.is_alive()
+
+
+def test_gate_reopens_after_restart_without_liveness_probes(tmp_path):
+    port = free_port()
+    proxy = RecordingProxy()
+    supervisor = make_supervisor([sys.executable, "-c", APP, str(port), str(tmp_path / "crashed")],
+                                 app_port=port,
+                                 proxy=proxy,
+                                 settings=SupervisorSettings(backoff_initial=0.1, liveness_interval=None))
+    runner = threading.Thread(target=supervisor.run, daemon=True)
+    runner.start()
+    try:
+        assert proxy.reopened.wait(10), "proxy gate was never reopened after the restart"
+        assert supervisor.restarts == 1
+    finally:
+        supervisor.stop(timeout=5)
+        runner.join(10)
+    assert not runner.is_alive()
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dbtunnel.vendor.asgiproxy import simple_proxy
+from dbtunnel.vendor.asgiproxy.simple_proxy import TokenValidator
+
+
+@pytest.fixture
+def workspace(monkeypatch):
+    """
+    Stands in for the workspace call, counts the validations that reach it.
+    """
+
+    class Workspace:
+        calls = 0
+        valid_tokens = {"good"}
+        release = threading.Event()
+
+        @classmethod
+        def validate_user(cls, url, user, token):
+            cls.calls += 1
+            cls.release.wait(5)
+            return token in cls.valid_tokens
+
+    Workspace.release.set()
+    monkeypatch.setattr(simple_proxy, "validate_user", Workspace.validate_user)
+    return Workspace
+
+
+def test_results_are_cached(workspace):
+    async def scenario():
+        validator = TokenValidator()
+        results = [await validator.validate("https://ws", "user", token) for token in ("good", "good", "bad", "bad")]
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+    assert workspace.calls == 2
+
+
+def test_cached_results_expire(workspace):
+    async def scenario():
+        validator = TokenValidator(positive_ttl=0.2, negative_ttl=0.1)
+        await validator.validate("https://ws", "user", "good")
+        await validator.validate("https://ws", "user", "bad")
+        time.sleep(0.3)
+        await validator.validate("https://ws", "user", "good")
+        await validator.validate("https://ws", "user", "bad")
+
+    asyncio.run(scenario())
+    assert workspace.calls == 4
+
+
+def test_concurrent_validations_share_one_call(workspace):
+    workspace.release.clear()
+
+    async def scenario():
+        validator = TokenValidator()
+        pending = [asyncio.create_task(validator.validate("https://ws", "user", "good")) for _ in range(5)]
+        await asyncio.sleep(0.1)
+        workspace.release.set()
+        return await asyncio.gather(*pending)
+
+    assert asyncio.run(scenario()) == [True] * 5
+    assert workspace.calls == 1
+
+
+def test_missing_user_or_token_is_rejected_without_a_call(workspace):
+    async def scenario():
+        validator = TokenValidator()
+        return [await validator.validate("https://ws", "", "good"), await validator.validate("https://ws", "user", "")]
+
+    assert asyncio.run(scenario()) == [False, False]
+    assert workspace.calls == 0
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from dbtunnel.warm_pool import WarmInterpreter, _warm_launch_spec
+
+
+def test_python_scripts_and_modules_run_warm():
+    assert _warm_launch_spec([sys.executable, "app.py", "--port", "1"]) == \
+        {"kind": "path", "path": "app.py", "argv": ["app.py", "--port", "1"]}
+    assert _warm_launch_spec([sys.executable, "-m", "http.server", "8000"]) == \
+        {"kind": "module", "module": "http.server", "argv": ["http.server", "8000"]}
+
+
+def test_console_scripts_run_warm():
+    assert _warm_launch_spec(["pytest", "-q"]) == {"kind": "console_script", "name": "pytest", "argv": ["pytest", "-q"]}
+
+
+@pytest.mark.parametrize("cmd", [
+    [sys.executable, "-c", "print(1)"],
+    [sys.executable],
+    ["/bin/sh", "-c", "true"],
+    ["not-a-console-script-anywhere"],
+])
+def test_other_commands_start_cold(cmd):
+    assert _warm_launch_spec(cmd) is None
+
+
+def fake_executable(path):
+    path.write_text("#!/bin/sh\nexit 0\n")
+    path.chmod(0o755)
+    return path
+
+
+def test_the_same_interpreter_behind_a_symlink_runs_warm(tmp_path):
+    link = tmp_path / "python3"
+    link.symlink_to(sys.executable)
+    assert _warm_launch_spec([str(link), "app.py"])["kind"] == "path"
+
+
+def test_other_interpreters_start_cold(tmp_path, monkeypatch):
+    other = fake_executable(tmp_path / "python3")
+    assert _warm_launch_spec([str(other), "app.py"]) is None
+    # a bare name resolves through PATH, e.g. to another virtualenv
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    assert _warm_launch_spec(["python3", "app.py"]) is None
+
+
+def test_console_scripts_of_other_environments_start_cold(tmp_path, monkeypatch):
+    fake_executable(tmp_path / "pytest")
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    assert _warm_launch_spec(["pytest", "-q"]) is None
+
+
+class Lines:
+
+    def __init__(self):
+        self.lines = []
+        self.lock = threading.Lock()
+
+    def __call__(self, lines):
+        with self.lock:
+            self.lines.extend(lines)
+
+
+def test_launch_spec_is_handed_over_through_the_fifo(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text("import os, sys\n"
+                      "print('warm' if 'colorsys' in sys.modules else 'cold')\n"
+                      "print(os.getcwd(), os.environ['APP_SETTING'], *sys.argv[1:])\n"
+                      "sys.exit(3)\n")
+    interpreter = WarmInterpreter(["colorsys"])
+    try:
+        assert interpreter.wait_until_ready(30)
+        assert interpreter.failed_imports == []
+        lines = Lines()
+        process = interpreter.launch(_warm_launch_spec([sys.executable, str(script), "--flag"]),
+                                     {**os.environ, "APP_SETTING": "value"}, lines, cwd=str(tmp_path))
+        assert process.wait(30) == 3
+    finally:
+        interpreter.close()
+    assert lines.lines[-2:] == ["warm", f"{tmp_path} value --flag"]
+    assert not os.path.exists(interpreter._fifo_path)
@@ -0,0 +1,75 @@
+import asyncio
+
+from dbtunnel.vendor.asgiproxy.context import ProxyContext
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks, framework_specific_proxy_config
+from dbtunnel.vendor.asgiproxy.simple_proxy import AuthLoopState, handle_websocket_token_auth, \
+    make_simple_proxy_app
+from dbtunnel.vendor.asgiproxy.utils.sessions import SESSION_COOKIE_NAME, SessionSigner
+
+SECRET = b"s" * 32
+USER = "me@example.com"
+
+
+def websocket_scope(cookie=None, user=USER):
+    headers = [(b"host", b"localhost:8080")]
+    if user is not None:
+        headers.append((b"x-databricks-user-name", user.encode("utf-8")))
+    if cookie is not None:
+        headers.append((b"cookie", f"other=1; {SESSION_COOKIE_NAME}={cookie}".encode("utf-8")))
+    return {"type": "websocket", "path": "/ws", "root_path": "", "query_string": b"", "headers": headers}
+
+
+def test_upgrade_with_a_valid_session_carries_the_token_upstream():
+    signer = SessionSigner(SECRET)
+    scope = websocket_scope(signer.sign(USER, "dapi123"))
+    assert handle_websocket_token_auth(signer, scope) == AuthLoopState.NotInAuthLoop
+    assert (b"Authorization", b"Bearer dapi123") in scope["headers"]
+    assert (b"cookie", b"other=1") in scope["headers"]
+
+
+def test_upgrade_without_a_session_is_rejected():
+    assert handle_websocket_token_auth(SessionSigner(SECRET), websocket_scope()) == AuthLoopState.StillInAuthLoop
+
+
+def test_upgrade_with_the_session_of_another_user_is_rejected():
+    signer = SessionSigner(SECRET)
+    scope = websocket_scope(signer.sign("you@example.com", "dapi123"))
+    assert handle_websocket_token_auth(signer, scope) == AuthLoopState.StillInAuthLoop
+
+
+def test_upgrade_without_a_user_is_rejected():
+    signer = SessionSigner(SECRET)
+    scope = websocket_scope(signer.sign(USER, "dapi123"), user=None)
+    assert handle_websocket_token_auth(signer, scope) == AuthLoopState.StillInAuthLoop
+
+
+def run_upgrade(scope):
+    config = framework_specific_proxy_config[Frameworks.GRADIO](
+        url_base_path="/", service_host="127.0.0.1", service_port=9999,
+        auth_config={"token_auth": True, "token_auth_workspace_url": "https://example.cloud.databricks.com"})
+    proxied, sent = [], []
+
+    async def proxy_websocket_handler(*, context, scope, receive, send):
+        proxied.append(scope)
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "websocket.connect"}
+
+    app = make_simple_proxy_app(ProxyContext(config), framework=Frameworks.GRADIO, proxy_port=8080,
+                                proxy_websocket_handler=proxy_websocket_handler, session_secret=SECRET)
+    asyncio.run(app(scope, receive, send))
+    return proxied, sent
+
+
+def test_proxy_app_closes_unauthenticated_upgrades():
+    proxied, sent = run_upgrade(websocket_scope())
+    assert proxied == []
+    assert sent == [{"type": "websocket.close", "code": 1008}]
+
+
+def test_proxy_app_passes_authenticated_upgrades():
+    proxied, sent = run_upgrade(websocket_scope(SessionSigner(SECRET).sign(USER, "dapi123")))
+    assert len(proxied) == 1 and sent == []
@@ -0,0 +1,60 @@
+import asyncio
+
+from dbtunnel.vendor.asgiproxy.context import ProxyContext
+from dbtunnel.vendor.asgiproxy.frameworks import Frameworks, framework_specific_proxy_config
+from dbtunnel.vendor.asgiproxy.proxies.websocket import WebSocketProxyContext, reap_websockets, \
+    release_websocket_slot, reserve_websocket_slot
+from dbtunnel.vendor.asgiproxy.settings import WebSocketSettings
+
+
+class FakeUpstream:
+    closed = False
+
+
+def make_context(**settings) -> ProxyContext:
+    config = framework_specific_proxy_config[Frameworks.GRADIO](url_base_path="/",
+                                                                service_host="127.0.0.1",
+                                                                service_port=9999)
+    return ProxyContext(config, websocket_settings=WebSocketSettings(**settings))
+
+
+def open_pair(context: ProxyContext, user: str) -> WebSocketProxyContext:
+    ws_ctx = WebSocketProxyContext(client_ws=None, upstream_ws=FakeUpstream(), user=user)
+    context.websockets[ws_ctx.id] = ws_ctx
+    return ws_ctx
+
+
+def test_concurrent_handshakes_can_not_exceed_the_global_cap():
+    context = make_context(max_connections=2)
+    # handshakes that are still connecting upstream hold their slot
+    assert reserve_websocket_slot(context, "a") is None
+    assert reserve_websocket_slot(context, "b") is None
+    assert reserve_websocket_slot(context, "c") is not None
+    release_websocket_slot(context, "a")
+    assert reserve_websocket_slot(context, "c") is None
+
+
+def test_concurrent_handshakes_can_not_exceed_the_per_user_cap():
+    context = make_context(max_connections_per_user=1)
+    assert reserve_websocket_slot(context, "a") is None
+    assert reserve_websocket_slot(context, "a") is not None
+    assert reserve_websocket_slot(context, "b") is None
+    release_websocket_slot(context, "a")
+    assert context.websocket_reservations == {"b": 1}
+
+
+def test_reaper_closes_idle_and_dead_pairs():
+    async def scenario():
+        context = make_context(idle_timeout=60, reaper_interval=0.01)
+        idle, dead, healthy = open_pair(context, "a"), open_pair(context, "b"), open_pair(context, "c")
+        idle.last_activity -= 120
+        dead.upstream_ws.closed = True
+        reaper = asyncio.create_task(reap_websockets(context))
+        await asyncio.sleep(0.05)
+        reaper.cancel()
+        return idle, dead, healthy
+
+    idle, dead, healthy = asyncio.run(scenario())
+    assert idle.close_reason.startswith("reaped: idle")
+    assert dead.close_reason == "reaped: upstream already closed"
+    assert healthy.close_reason is None
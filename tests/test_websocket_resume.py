@@ -0,0 +1,196 @@
+import asyncio
+
+from aiohttp import WSMessage, WSMsgType
+
+from dbtunnel.vendor.asgiproxy.proxies.websocket import WebSocketProxyContext
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self) -> dict:
+        return await self.incoming.get()
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+    def say(self, text: str):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": text})
+
+
+class FakeUpstream:
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.closed = False
+        self.close_code = None
+        self.close_calls = 0
+
+    async def receive(self) -> WSMessage:
+        return await self.incoming.get()
+
+    async def send_str(self, data: str):
+        if self.closed:
+            raise ConnectionResetError("Cannot write to closing transport")
+        self.sent.append(data)
+
+    async def close(self):
+        self.close_calls += 1
+        self.closed = True
+
+    def say(self, text: str):
+        self.incoming.put_nowait(WSMessage(WSMsgType.TEXT, text, None))
+
+    def die(self):
+        self.closed = True
+        self.close_code = 1006
+        self.incoming.put_nowait(WSMessage(WSMsgType.CLOSED, None, None))
+
+
+class Reconnector:
+
+    def __init__(self, fail: bool = False, hang: bool = False):
+        self.fail = fail
+        self.hang = hang
+        self.allowed = asyncio.Event()
+        self.upstreams = []
+
+    async def __call__(self) -> FakeUpstream:
+        if self.fail:
+            raise ConnectionRefusedError("app is still down")
+        if self.hang:
+            await asyncio.Event().wait()
+        await self.allowed.wait()
+        upstream = FakeUpstream()
+        self.upstreams.append(upstream)
+        return upstream
+
+
+async def until(check, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def make_context(client, upstream, reconnect, replay_messages=0, resume_grace_period=5):
+    return WebSocketProxyContext(client_ws=client, upstream_ws=upstream, reconnect=reconnect,
+                                 resume_grace_period=resume_grace_period, replay_messages=replay_messages)
+
+
+def test_resume_replays_the_handshake_and_keeps_the_client():
+    async def scenario():
+        client, upstream, reconnect = FakeClient(), FakeUpstream(), Reconnector()
+        ws_ctx = make_context(client, upstream, reconnect, replay_messages=1)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        client.say("subscribe")
+        client.say("not part of the handshake")
+        await until(lambda: len(upstream.sent) == 2)
+
+        upstream.die()
+        await until(lambda: ws_ctx.resuming)
+        reconnect.allowed.set()
+        await until(lambda: not ws_ctx.resuming)
+        resumed = reconnect.upstreams[0]
+        assert resumed.sent == ["subscribe"]
+
+        resumed.say("after restart")
+        await until(lambda: client.sent == ["after restart"])
+        assert not loop_task.done()
+        loop_task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_resume_gives_up_after_the_grace_period():
+    async def scenario():
+        client, upstream = FakeClient(), FakeUpstream()
+        ws_ctx = make_context(client, upstream, Reconnector(fail=True), resume_grace_period=0.3)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        upstream.die()
+        await asyncio.wait_for(loop_task, 5)
+        return ws_ctx
+
+    ws_ctx = asyncio.run(scenario())
+    assert ws_ctx.close_reason == "upstream closed (code 1006)"
+
+
+def test_resume_closes_the_dead_upstream():
+    async def scenario():
+        client, upstream, reconnect = FakeClient(), FakeUpstream(), Reconnector()
+        ws_ctx = make_context(client, upstream, reconnect)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        upstream.die()
+        await until(lambda: ws_ctx.resuming)
+        assert upstream.close_calls == 1
+
+        reconnect.allowed.set()
+        await until(lambda: not ws_ctx.resuming)
+        assert ws_ctx.upstream_ws is reconnect.upstreams[0]
+        assert reconnect.upstreams[0].close_calls == 0
+        loop_task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_hanging_reconnect_is_bounded_by_the_grace_period():
+    async def scenario():
+        client, upstream = FakeClient(), FakeUpstream()
+        ws_ctx = make_context(client, upstream, Reconnector(hang=True), resume_grace_period=0.3)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        upstream.die()
+        await asyncio.wait_for(loop_task, 2)
+        return ws_ctx
+
+    ws_ctx = asyncio.run(scenario())
+    assert not ws_ctx.resuming
+    assert ws_ctx.close_reason == "upstream closed (code 1006)"
+
+
+def test_message_sent_while_resuming_is_replayed_once():
+    async def scenario():
+        client, upstream, reconnect = FakeClient(), FakeUpstream(), Reconnector()
+        ws_ctx = make_context(client, upstream, reconnect, replay_messages=2)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        client.say("hello")
+        await until(lambda: upstream.sent == ["hello"])
+
+        upstream.die()
+        await until(lambda: ws_ctx.resuming)
+        client.say("during resume")
+        await until(lambda: len(ws_ctx._resume_buffer) == 1)
+        reconnect.allowed.set()
+        await until(lambda: not ws_ctx.resuming)
+
+        assert reconnect.upstreams[0].sent == ["hello", "during resume"]
+        assert not loop_task.done()
+        loop_task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_send_on_dead_upstream_is_held_for_resume():
+    async def scenario():
+        client, upstream, reconnect = FakeClient(), FakeUpstream(), Reconnector()
+        ws_ctx = make_context(client, upstream, reconnect)
+        loop_task = asyncio.create_task(ws_ctx.loop())
+        # the upstream is gone but the upstream pump has not received the close yet
+        upstream.closed = True
+        client.say("before the close is noticed")
+        await until(lambda: len(ws_ctx._resume_buffer) == 1)
+        assert not loop_task.done()
+
+        reconnect.allowed.set()
+        upstream.incoming.put_nowait(WSMessage(WSMsgType.CLOSED, None, None))
+        await until(lambda: reconnect.upstreams and reconnect.upstreams[0].sent)
+
+        assert reconnect.upstreams[0].sent == ["before the close is noticed"]
+        assert ws_ctx.close_reason is None
+        assert not loop_task.done()
+        loop_task.cancel()
+
+    asyncio.run(scenario())
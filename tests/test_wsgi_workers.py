@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+from dbtunnel.server_profiles import SERVER_PROFILES
+from dbtunnel.wsgi_workers import WsgiWorkerSettings, gunicorn_options, gunicorn_command, _gunicorn_application
+
+gunicorn_config = pytest.importorskip("gunicorn.config")
+
+ENV = {"SCRIPT_NAME": "/driver-proxy/o/1/abc/9000", "DASH_DEBUG": "false"}
+
+
+def options(threads: int = 2):
+    settings = WsgiWorkerSettings(workers=4, threads=threads, app_ref="my_app:app", timeout=60)
+    return gunicorn_options(settings, 9000, SERVER_PROFILES["high-throughput"], ENV)
+
+
+def test_app_ref_mode_runs_gunicorn_with_every_option_as_a_flag():
+    cmd = gunicorn_command(options(), "my_app:app")
+
+    assert cmd == [sys.executable, "-m", "gunicorn",
+                   "--bind", "0.0.0.0:9000",
+                   "--workers", "4",
+                   "--threads", "2",
+                   "--worker-class", "gthread",
+                   "--timeout", "60",
+                   "--backlog", "4096",
+                   "--keep-alive", "30",
+                   "--env", "SCRIPT_NAME=/driver-proxy/o/1/abc/9000",
+                   "--env", "DASH_DEBUG=false",
+                   "my_app:app"]
+
+
+def test_app_ref_mode_flags_are_understood_by_gunicorn():
+    args = gunicorn_config.Config().parser().parse_args(gunicorn_command(options(), "my_app:app")[3:])
+
+    assert args.bind == ["0.0.0.0:9000"]
+    assert (args.workers, args.threads, args.worker_class) == (4, 2, "gthread")
+    assert (args.timeout, args.backlog, args.keepalive) == (60, 4096, 30)
+    assert args.raw_env == ["SCRIPT_NAME=/driver-proxy/o/1/abc/9000", "DASH_DEBUG=false"]
+    assert args.args == ["my_app:app"]
+
+
+def test_fork_mode_applies_the_same_options_to_the_application():
+    def wsgi_app(environ, start_response):
+        pass
+
+    application = _gunicorn_application(wsgi_app, options(threads=1))
+
+    assert application.cfg.bind == ["0.0.0.0:9000"]
+    assert (application.cfg.workers, application.cfg.threads, application.cfg.worker_class_str) == (4, 1, "sync")
+    assert application.cfg.env == ENV
+    assert application.load() is wsgi_app